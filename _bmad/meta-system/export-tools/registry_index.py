@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+MAS Registry Index
+Persistent, searchable index over registry.yaml and installed skill.json files
+
+The registry and every `<skills-dir>/*/skill.json` are compiled into a SQLite
+database with an inverted index over name, description, tags and
+capabilities. `update()` only re-reads sources whose size or mtime changed,
+so keeping the index current is cheap. When a skill appears in both places,
+the installed skill.json wins. Query terms match whole words, except the
+last one, which matches as a prefix (type-ahead). Long-lived processes open
+the index with `preload=True` to search an in-memory copy: repeated queries
+and specific terms take well under a millisecond, while the first query for
+a wide prefix merges its postings once. One-shot CLI calls query SQLite
+directly.
+
+Usage:
+  python3 registry_index.py update
+  python3 registry_index.py search "json validation" [--tag testing] [--type base]
+  python3 registry_index.py show json-validator
+  python3 registry_index.py deps data-pipeline
+"""
+
+import os
+import re
+import sys
+import json
+import heapq
+import bisect
+import sqlite3
+import itertools
+import argparse
+from collections import OrderedDict
+from pathlib import Path
+
+
+INDEX_FORMAT = 2
+DEFAULT_REGISTRY = "_bmad/meta-system/registry.yaml"
+DEFAULT_SKILLS_DIRS = [".claude/skills"]
+
+# Installed skills shadow registry entries of the same name
+PRIORITY = {"skill.json": 0, "registry": 1}
+
+# Term weights per field; a term found in several fields keeps the highest.
+# A query that spells a skill's full name ranks that skill first.
+FIELD_WEIGHTS = {"name": 4, "tag": 3, "capability": 2, "description": 1}
+
+# Prefixes covering more terms than this keep their merged postings in memory
+PREFIX_CACHE_TERMS = 32
+# Recent query results kept by a preloaded index
+RESULT_CACHE_SIZE = 1024
+
+def default_db_path():
+    """`<CACHE_DIR>/registry-index.sqlite`, outside the tracked tree like the other MAS caches"""
+    cache_dir = os.environ.get("CACHE_DIR") or Path(
+        os.environ.get("MAS_PROJECT_ROOT", os.getcwd())) / "_bmad" / "_cache"
+    return Path(cache_dir) / "registry-index.sqlite"
+
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_DEPENDENCY = re.compile(r"^([^@\s]+)(?:@(.+))?$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS skills (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    version TEXT,
+    type TEXT,
+    description TEXT,
+    shadowed INTEGER NOT NULL DEFAULT 0,
+    doc TEXT NOT NULL,
+    UNIQUE (name, source)
+);
+CREATE INDEX IF NOT EXISTS skills_source ON skills (source);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    skill_id INTEGER NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (term, skill_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_skill ON postings (skill_id);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    skill_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, skill_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_skill ON tags (skill_id);
+CREATE TABLE IF NOT EXISTS dependencies (
+    skill_id INTEGER NOT NULL,
+    dependency TEXT NOT NULL,
+    spec TEXT
+);
+CREATE INDEX IF NOT EXISTS dependencies_skill ON dependencies (skill_id);
+"""
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def index_terms(skill):
+    """{term: weight} for one skill document"""
+    terms = {}
+
+    def add(term, field):
+        weight = FIELD_WEIGHTS[field]
+        if terms.get(term, 0) < weight:
+            terms[term] = weight
+
+    for token in tokenize(skill.get("name", "")):
+        add(token, "name")
+    for tag in skill.get("tags") or []:
+        for token in tokenize(tag):
+            add(token, "tag")
+    for capability in skill.get("capabilities") or []:
+        for token in tokenize(capability):
+            add(token, "capability")
+    for token in tokenize(skill.get("description") or ""):
+        add(token, "description")
+    return terms
+
+
+def dependency_specs(skill):
+    """(name, constraint) pairs from a list or skill.json-style {"skills": [...]} dependencies"""
+    dependencies = skill.get("dependencies") or []
+    if isinstance(dependencies, dict):
+        dependencies = dependencies.get("skills") or []
+    specs = []
+    for entry in dependencies:
+        match = _DEPENDENCY.match(str(entry).strip())
+        if match:
+            specs.append((match.group(1), match.group(2)))
+    return specs
+
+
+def load_registry(path):
+    """Skill entries of a registry.yaml or registry.json"""
+    path = Path(path)
+    if path.suffix in (".yaml", ".yml"):
+        import yaml  # only needed when the registry changed
+        with open(path, "r") as f:
+            try:
+                registry = yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid YAML: {e}") from e
+    else:
+        with open(path, "r") as f:
+            registry = json.load(f)
+    components = registry.get("components") or registry
+    return [skill for skill in components.get("skills") or [] if isinstance(skill, dict) and skill.get("name")]
+
+
+class SearchCache:
+    """In-memory copy of the inverted index for long-lived processes
+
+    Postings are held per term as {skill id: weight}. Every query term but
+    the last must match exactly and is a plain lookup; the last one matches
+    as a prefix. Merged postings of wide prefixes are kept.
+    Single-term queries walk a list pre-sorted by (weight, name) and stop
+    after `limit` hits. Multi-term queries intersect, starting from the
+    rarest term. Recent results are kept until the index changes.
+    """
+
+    def __init__(self, db):
+        self.skills = {}
+        self.rank = {}
+        self.names = {}
+        for position, (skill_id, name, version, skill_type, description) in enumerate(db.execute(
+                "SELECT id, name, version, type, description FROM skills WHERE shadowed = 0 ORDER BY name")):
+            self.skills[skill_id] = (name, version, skill_type, description)
+            self.rank[skill_id] = position
+            self.names[name] = skill_id
+        self.order = list(self.skills)
+
+        self.postings = {}
+        for term, skill_id, weight in db.execute("SELECT term, skill_id, weight FROM postings"):
+            if skill_id in self.skills:
+                self.postings.setdefault(term, {})[skill_id] = weight
+        self.terms = sorted(self.postings)
+        self._ranked = {}
+        self._prefixes = {}
+        self._results = OrderedDict()
+
+        self.tags = {}
+        for tag, skill_id in db.execute("SELECT tag, skill_id FROM tags"):
+            if skill_id in self.skills:
+                self.tags.setdefault(tag, set()).add(skill_id)
+
+    def _expand(self, prefix):
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\uffff", start)
+        return self.terms[start:end]
+
+    def _matches(self, term, prefix=False):
+        """{skill id: weight} for `term`, or for all terms starting with it; and the term if only one matched"""
+        if not prefix:
+            ids = self.postings.get(term)
+            return (ids, term) if ids is not None else ({}, None)
+        cached = self._prefixes.get(term)
+        if cached is not None:
+            return cached, None
+        terms = self._expand(term)
+        if len(terms) == 1:
+            return self.postings[terms[0]], terms[0]
+        merged = {}
+        for expanded in terms:
+            for skill_id, weight in self.postings[expanded].items():
+                if weight > merged.get(skill_id, 0):
+                    merged[skill_id] = weight
+        if len(terms) > PREFIX_CACHE_TERMS:
+            self._prefixes[term] = merged
+        return merged, None
+
+    def _ranked_ids(self, term):
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            ids = self.postings[term]
+            ranked = self._ranked[term] = sorted(ids, key=lambda skill_id: (-ids[skill_id], self.rank[skill_id]))
+        return ranked
+
+    def search(self, terms, tags=None, skill_type=None, limit=20):
+        """Rows of (name, version, type, description, score), best first"""
+        key = (tuple(terms), tuple(sorted(tags)) if tags else None, skill_type, limit)
+        rows = self._results.get(key)
+        if rows is None:
+            rows = self._results[key] = self._search(terms, tags, skill_type, limit)
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        else:
+            self._results.move_to_end(key)
+        return list(rows)
+
+    def _search(self, terms, tags, skill_type, limit):
+        allowed = set().union(*(self.tags.get(tag.lower(), ()) for tag in tags)) if tags else None
+
+        def keep(skill_id):
+            return (allowed is None or skill_id in allowed) and \
+                (skill_type is None or self.skills[skill_id][2] == skill_type)
+
+        if not terms:
+            hits = [(skill_id, 0) for skill_id in itertools.islice(filter(keep, self.order), limit)]
+        else:
+            last = len(terms) - 1
+            matches = sorted((self._matches(term, prefix=i == last) for i, term in enumerate(terms)),
+                             key=lambda match: len(match[0]))
+            if len(matches) == 1:
+                ids, term = matches[0]
+                if term:
+                    ranked = itertools.islice(filter(keep, self._ranked_ids(term)), limit)
+                else:
+                    # Several terms merged: select the top `limit` without sorting them all
+                    ranked = heapq.nsmallest(limit, filter(keep, ids),
+                                             key=lambda skill_id: (-ids[skill_id], self.rank[skill_id]))
+                hits = [(skill_id, ids[skill_id]) for skill_id in ranked]
+            else:
+                scores = dict(matches[0][0])
+                for ids, _ in matches[1:]:
+                    scores = {skill_id: score + ids[skill_id] for skill_id, score in scores.items() if skill_id in ids}
+                best = heapq.nsmallest(limit, filter(keep, scores),
+                                       key=lambda skill_id: (-scores[skill_id], self.rank[skill_id]))
+                hits = [(skill_id, scores[skill_id]) for skill_id in best]
+
+            exact = self.names.get("-".join(terms))
+            if exact is not None and keep(exact) and all(exact in ids for ids, _ in matches):
+                score = sum(ids[exact] for ids, _ in matches)
+                hits = [(exact, score)] + [hit for hit in hits if hit[0] != exact][:limit - 1]
+
+        return [(*self.skills[skill_id], score) for skill_id, score in hits]
+
+
+class RegistryIndex:
+    def __init__(self, db_path, preload=False):
+        """Open (or create) the index; `preload` serves searches from memory"""
+        self.preload = preload
+        self._cache = None
+        self._data_version = None
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != INDEX_FORMAT:
+            self._reset()
+
+    def _reset(self):
+        for table in ("sources", "skills", "postings", "tags", "dependencies"):
+            self.db.execute(f"DROP TABLE IF EXISTS {table}")
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {INDEX_FORMAT}")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Updating ----------
+
+    def update(self, registry=None, skills_dirs=()):
+        """Re-index changed sources and drop vanished ones; returns the number re-indexed"""
+        current = {}
+        if registry and Path(registry).exists():
+            current[str(registry)] = "registry"
+        for skills_dir in skills_dirs:
+            if not os.path.isdir(skills_dir):
+                continue
+            with os.scandir(skills_dir) as entries:
+                for entry in entries:
+                    manifest = os.path.join(entry.path, "skill.json")
+                    if entry.is_dir() and os.path.isfile(manifest):
+                        current[manifest] = "skill.json"
+
+        known = dict(((path, (size, mtime)) for path, size, mtime in
+                      self.db.execute("SELECT path, size, mtime_ns FROM sources")))
+        changed = 0
+        with self.db:
+            for path in known.keys() - current.keys():
+                self._remove_source(path)
+                changed += 1
+            for path, kind in current.items():
+                st = os.stat(path)
+                if known.get(path) != (st.st_size, st.st_mtime_ns):
+                    self._index_source(path, kind, st)
+                    changed += 1
+            if changed:
+                self._update_shadowing()
+                self._cache = None
+        return changed
+
+    def update_skill(self, skill_dir):
+        """Re-index one installed skill after it changed (or was removed)"""
+        manifest = os.path.join(skill_dir, "skill.json")
+        with self.db:
+            if os.path.isfile(manifest):
+                self._index_source(manifest, "skill.json", os.stat(manifest))
+            else:
+                self._remove_source(manifest)
+            self._update_shadowing()
+        self._cache = None
+
+    def _index_source(self, path, kind, st):
+        self._remove_source(path)
+        try:
+            if kind == "registry":
+                skills = load_registry(path)
+            else:
+                with open(path, "r") as f:
+                    skills = [json.load(f)]
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping {path}: {e}", file=sys.stderr)
+            skills = []
+
+        for skill in skills:
+            if not isinstance(skill, dict) or not skill.get("name"):
+                continue
+            cursor = self.db.execute(
+                "INSERT OR REPLACE INTO skills (name, source, priority, version, type, description, doc) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(skill["name"]), path, PRIORITY[kind], str(skill.get("version", "")), skill.get("type"),
+                 skill.get("description"), json.dumps(skill, default=str)),
+            )
+            skill_id = cursor.lastrowid
+            self.db.executemany(
+                "INSERT INTO postings (term, skill_id, weight) VALUES (?, ?, ?)",
+                ((term, skill_id, weight) for term, weight in index_terms(skill).items()),
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO tags (tag, skill_id) VALUES (?, ?)",
+                ((str(tag).lower(), skill_id) for tag in skill.get("tags") or []),
+            )
+            self.db.executemany(
+                "INSERT INTO dependencies (skill_id, dependency, spec) VALUES (?, ?, ?)",
+                ((skill_id, name, spec) for name, spec in dependency_specs(skill)),
+            )
+        self.db.execute(
+            "INSERT OR REPLACE INTO sources (path, size, mtime_ns) VALUES (?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns),
+        )
+
+    def _remove_source(self, path):
+        ids = "SELECT id FROM skills WHERE source = ?"
+        for table in ("postings", "tags", "dependencies"):
+            self.db.execute(f"DELETE FROM {table} WHERE skill_id IN ({ids})", (path,))
+        self.db.execute("DELETE FROM skills WHERE source = ?", (path,))
+        self.db.execute("DELETE FROM sources WHERE path = ?", (path,))
+
+    def _update_shadowing(self):
+        self.db.execute(
+            "UPDATE skills SET shadowed = EXISTS (SELECT 1 FROM skills other WHERE other.name = skills.name "
+            "AND (other.priority < skills.priority OR (other.priority = skills.priority AND other.id < skills.id)))"
+        )
+
+    # ---------- Queries ----------
+
+    def search(self, query="", tags=None, skill_type=None, limit=20):
+        """Skills matching every query term (the last one as a prefix), best matches first
+
+        `tags` keeps skills having any of the tags; `skill_type` filters by type.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if self.preload:
+            rows = self._search_cache().search(terms, tags, skill_type, limit)
+        else:
+            rows = self._search_sql(terms, tags, skill_type, limit)
+        return [
+            {"name": name, "version": version, "type": skill_type, "description": description, "score": score}
+            for name, version, skill_type, description, score in rows
+        ]
+
+    def _search_cache(self):
+        # data_version changes when another connection commits to the index
+        version = self.db.execute("PRAGMA data_version").fetchone()[0]
+        if self._cache is None or version != self._data_version:
+            self._cache = SearchCache(self.db)
+            self._data_version = version
+        return self._cache
+
+    def _search_sql(self, terms, tags, skill_type, limit):
+        filters, params = ["s.shadowed = 0"], []
+        if tags:
+            filters.append(f"s.id IN (SELECT skill_id FROM tags WHERE tag IN ({', '.join('?' * len(tags))}))")
+            params.extend(tag.lower() for tag in tags)
+        if skill_type:
+            filters.append("s.type = ?")
+            params.append(skill_type)
+        where = " AND ".join(filters)
+
+        if not terms:
+            return self.db.execute(
+                f"SELECT s.name, s.version, s.type, s.description, 0 FROM skills s WHERE {where} "
+                f"ORDER BY s.name LIMIT ?", params + [limit]
+            ).fetchall()
+        matches = " UNION ALL ".join(
+            ["SELECT skill_id, weight FROM postings WHERE term = ?"] * (len(terms) - 1) +
+            ["SELECT skill_id, MAX(weight) AS weight FROM postings WHERE term >= ? AND term < ? GROUP BY skill_id"]
+        )
+        term_params = terms[:-1] + [terms[-1], terms[-1] + "\uffff"]
+        return self.db.execute(
+            f"SELECT s.name, s.version, s.type, s.description, SUM(m.weight) AS score "
+            f"FROM ({matches}) m JOIN skills s ON s.id = m.skill_id WHERE {where} "
+            f"GROUP BY m.skill_id HAVING COUNT(*) = ? ORDER BY s.name = ? DESC, score DESC, s.name LIMIT ?",
+            term_params + params + [len(terms), "-".join(terms), limit],
+        ).fetchall()
+
+    def get(self, name):
+        """Full document of a skill, or None"""
+        row = self.db.execute("SELECT doc FROM skills WHERE name = ? AND shadowed = 0", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def dependencies(self, name):
+        return [
+            (dependency, spec) for dependency, spec in self.db.execute(
+                "SELECT d.dependency, d.spec FROM dependencies d JOIN skills s ON s.id = d.skill_id "
+                "WHERE s.name = ? AND s.shadowed = 0", (name,)
+            )
+        ]
+
+    def resolve(self, name):
+        """Transitive dependencies of `name`, dependencies first
+
+        Returns {"order": [...], "missing": [...]}; raises ValueError on cycles.
+        """
+        if self.get(name) is None:
+            raise KeyError(f"Unknown skill: {name}")
+
+        # Depth-first with an explicit stack, so long chains cannot hit the recursion limit
+        order, missing = [], []
+        state = {name: "visiting"}
+        path = [name]
+        stack = [iter(self.dependencies(name))]
+        while stack:
+            dependency = next(stack[-1], None)
+            if dependency is None:
+                stack.pop()
+                skill = path.pop()
+                state[skill] = "done"
+                order.append(skill)
+                continue
+            skill = dependency[0]
+            if state.get(skill) == "done":
+                continue
+            if state.get(skill) == "visiting":
+                cycle = path[path.index(skill):] + [skill]
+                raise ValueError(f"Dependency cycle: {' -> '.join(cycle)}")
+            if self.get(skill) is None:
+                state[skill] = "done"
+                missing.append(skill)
+                continue
+            state[skill] = "visiting"
+            path.append(skill)
+            stack.append(iter(self.dependencies(skill)))
+        return {"order": order[:-1], "missing": missing}
+
+    def stats(self):
+        count = lambda sql: self.db.execute(sql).fetchone()[0]
+        return {
+            "sources": count("SELECT COUNT(*) FROM sources"),
+            "skills": count("SELECT COUNT(*) FROM skills WHERE shadowed = 0"),
+            "terms": count("SELECT COUNT(DISTINCT term) FROM postings"),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed search over the MAS registry and installed skills")
+    parser.add_argument("--db", help="Index database (default: $CACHE_DIR/registry-index.sqlite)")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY, help=f"registry.yaml or registry.json "
+                        f"(default {DEFAULT_REGISTRY})")
+    parser.add_argument("--skills-dir", action="append", help="Installed skills (default .claude/skills, repeatable)")
+    parser.add_argument("--no-update", action="store_true", help="Query the index as is")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("update", help="Re-index changed sources")
+    search = commands.add_parser("search", help="Search skills")
+    search.add_argument("query", nargs="?", default="")
+    search.add_argument("--tag", action="append", help="Keep skills with this tag (repeatable)")
+    search.add_argument("--type", choices=["base", "meta", "composite"])
+    search.add_argument("--limit", type=int, default=20)
+    show = commands.add_parser("show", help="Show a skill's full entry")
+    show.add_argument("name")
+    deps = commands.add_parser("deps", help="Resolve a skill's dependencies")
+    deps.add_argument("name")
+    args = parser.parse_args()
+
+    db_path = args.db or default_db_path()
+    with RegistryIndex(db_path) as index:
+        if args.command == "update" or not args.no_update:
+            changed = index.update(args.registry, args.skills_dir or DEFAULT_SKILLS_DIRS)
+            if args.command == "update":
+                print(json.dumps({"reindexed": changed, **index.stats()}, indent=2))
+                return
+
+        try:
+            if args.command == "search":
+                result = index.search(args.query, args.tag, args.type, args.limit)
+            elif args.command == "show":
+                result = index.get(args.name)
+                if result is None:
+                    raise KeyError(f"Unknown skill: {args.name}")
+            else:
+                result = index.resolve(args.name)
+        except (KeyError, ValueError) as e:
+            print(f"❌ {e.args[0]}", file=sys.stderr)
+            sys.exit(1)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Compiled JSON Schema validation for skill manifests
+
+A dependency-free validator for the draft-07 keywords used by
+schemas/skill.json and schemas/registry.json. A schema is compiled once into
+nested check functions, so validating many documents does not re-walk the
+schema. Unsupported keywords raise SchemaError at compile time rather than
+being skipped. `format` is treated as an annotation, as draft-07 allows.
+"""
+
+import re
+
+ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "examples", "default", "format"}
+
+TYPES = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: (isinstance(value, int) and not isinstance(value, bool))
+    or (isinstance(value, float) and value.is_integer()),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class SchemaError(Exception):
+    """The schema uses a keyword this validator does not implement"""
+
+
+def child_path(path, key):
+    """JSON path of `key` (a property name or array index) below `path`"""
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    if _IDENTIFIER.match(key):
+        return f"{path}.{key}"
+    return f"{path}[{key!r}]"
+
+
+def _is_number(value):
+    return TYPES["number"](value)
+
+
+def _equal(a, b):
+    # JSON true is not 1, although Python's True == 1
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    return a == b
+
+
+def _preview(value, limit=40):
+    return repr(value if len(value) <= limit else value[:limit] + "...")
+
+
+def _compile(schema, where):
+    if schema is True or schema == {}:
+        return None
+    if schema is False:
+        return lambda value, path, errors: errors.append((path, "False schema does not allow any value"))
+    if not isinstance(schema, dict):
+        raise SchemaError(f"{where}: schema must be an object or boolean")
+
+    checks = []
+    handled = set(ANNOTATIONS)
+
+    def keyword(name):
+        handled.add(name)
+        return schema[name]
+
+    if "type" in schema:
+        expected = keyword("type")
+        names = [expected] if isinstance(expected, str) else list(expected)
+        unknown = [name for name in names if name not in TYPES]
+        if unknown:
+            raise SchemaError(f"{where}: unknown type {unknown[0]!r}")
+        type_tests = [TYPES[name] for name in names]
+        label = expected if isinstance(expected, str) else names
+
+        def check_type(value, path, errors):
+            if not any(test(value) for test in type_tests):
+                errors.append((path, f"{value!r} is not of type {label!r}"))
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = keyword("enum")
+
+        def check_enum(value, path, errors):
+            if not any(_equal(value, option) for option in allowed):
+                errors.append((path, f"{value!r} is not one of {allowed!r}"))
+        checks.append(check_enum)
+
+    if "const" in schema:
+        constant = keyword("const")
+
+        def check_const(value, path, errors):
+            if not _equal(value, constant):
+                errors.append((path, f"{constant!r} was expected"))
+        checks.append(check_const)
+
+    # Strings
+    if "minLength" in schema or "maxLength" in schema or "pattern" in schema:
+        min_length = schema.get("minLength")
+        max_length = schema.get("maxLength")
+        pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+        handled.update({"minLength", "maxLength", "pattern"})
+
+        def check_string(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append((path, f"{value!r} is too short"))
+            if max_length is not None and len(value) > max_length:
+                errors.append((path, f"{_preview(value)} is too long"))
+            if pattern is not None and not pattern.search(value):
+                errors.append((path, f"{_preview(value)} does not match '{pattern.pattern}'"))
+        checks.append(check_string)
+
+    # Numbers
+    bounds = [(name, schema[name]) for name in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+              if name in schema]
+    if bounds:
+        handled.update(name for name, _ in bounds)
+        messages = {
+            "minimum": (lambda v, b: v < b, "is less than the minimum of"),
+            "maximum": (lambda v, b: v > b, "is greater than the maximum of"),
+            "exclusiveMinimum": (lambda v, b: v <= b, "is less than or equal to the minimum of"),
+            "exclusiveMaximum": (lambda v, b: v >= b, "is greater than or equal to the maximum of"),
+        }
+        bound_tests = [(messages[name][0], bound, messages[name][1]) for name, bound in bounds]
+
+        def check_bounds(value, path, errors):
+            if not _is_number(value):
+                return
+            for fails, bound, message in bound_tests:
+                if fails(value, bound):
+                    errors.append((path, f"{value!r} {message} {bound!r}"))
+        checks.append(check_bounds)
+
+    # Arrays
+    if "items" in schema or "minItems" in schema or "maxItems" in schema or "uniqueItems" in schema:
+        items = schema.get("items", True)
+        if isinstance(items, list):
+            raise SchemaError(f"{where}: tuple-form items is not supported")
+        item_check = _compile(items, f"{where}/items")
+        min_items = schema.get("minItems")
+        max_items = schema.get("maxItems")
+        unique = schema.get("uniqueItems", False)
+        handled.update({"items", "minItems", "maxItems", "uniqueItems"})
+
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append((path, f"{value!r} is too short"))
+            if max_items is not None and len(value) > max_items:
+                errors.append((path, f"{value!r} is too long"))
+            if unique and len({repr(item) for item in value}) < len(value):
+                errors.append((path, f"{value!r} has non-unique elements"))
+            if item_check:
+                for i, item in enumerate(value):
+                    item_check(item, child_path(path, i), errors)
+        checks.append(check_array)
+
+    # Objects
+    if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+        properties = {
+            name: _compile(subschema, f"{where}/properties/{name}")
+            for name, subschema in schema.get("properties", {}).items()
+        }
+        required = schema.get("required", [])
+        additional = schema.get("additionalProperties", True)
+        additional_check = None if additional is False else _compile(additional, f"{where}/additionalProperties")
+        handled.update({"properties", "required", "additionalProperties"})
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append((path, f"{name!r} is a required property"))
+            unexpected = []
+            for name, item in value.items():
+                if name in properties:
+                    if properties[name]:
+                        properties[name](item, child_path(path, name), errors)
+                elif additional is False:
+                    unexpected.append(name)
+                elif additional_check:
+                    additional_check(item, child_path(path, name), errors)
+            if unexpected:
+                names = ", ".join(repr(name) for name in unexpected)
+                verb = "was" if len(unexpected) == 1 else "were"
+                errors.append((path, f"Additional properties are not allowed ({names} {verb} unexpected)"))
+        checks.append(check_object)
+
+    unsupported = sorted(set(schema) - handled)
+    if unsupported:
+        raise SchemaError(f"{where}: unsupported keyword {unsupported[0]!r}")
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+    return check_all
+
+
+class Schema:
+    """A JSON Schema compiled for repeated validation"""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._check = _compile(schema, "#")
+
+    def errors(self, instance):
+        """Every violation in `instance` as (JSON path, message), in document order"""
+        errors = []
+        if self._check:
+            self._check(instance, "$", errors)
+        return errors
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+GitHub Actions: Run every skill check against one index
+
+Walks `skills/` once and runs validation, the security scan and the
+integration tests on the shared SkillIndex, so each file is stat'ed once
+and each SKILL.md and script is read once. The combined report is written
+to /tmp/validation-report.txt.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import security_scan
+import test_integration
+import validate_skills
+from skill_index import SkillIndex
+
+
+def run_checks(skills_dir, cache_dir=None, jobs=None, schemas_dir=None, registry=None):
+    """Run all checks; returns (report text, failed)"""
+    started = time.perf_counter()
+    index = SkillIndex.build(skills_dir)
+    indexed = time.perf_counter()
+
+    schemas = validate_skills.load_schemas(schemas_dir) if schemas_dir else None
+    validation_cache = validate_skills.open_cache(cache_dir, schemas)
+    errors, warnings = validate_skills.check_index(index, validation_cache, schemas, jobs)
+    validation_cache.save()
+    if registry:
+        registry_errors, registry_warnings = validate_skills.validate_registry(registry, schemas)
+        errors.extend(registry_errors)
+        warnings.extend(registry_warnings)
+
+    scan_cache = security_scan.open_cache(cache_dir)
+    security_issues = security_scan.check_index(index, jobs, scan_cache)
+    scan_cache.save()
+
+    test_cache = test_integration.open_cache(cache_dir)
+    timings = {}
+    test_issues = test_integration.check_index(index, test_cache, jobs, timings)
+    test_cache.save()
+
+    files = sum(1 for _ in index.files())
+    print(
+        f"Indexed {len(index.skills)} skills, {files} files in {indexed - started:.2f}s; "
+        f"checks took {time.perf_counter() - indexed:.2f}s",
+        file=sys.stderr,
+    )
+    report = format_report(errors, warnings, security_issues, test_issues, timings)
+    return report, bool(errors or security_issues or test_issues)
+
+
+def format_report(errors, warnings, security_issues, test_issues, timings=None):
+    """The combined report of all checks"""
+    sections = [validate_skills.format_report(errors, warnings)]
+    if security_issues:
+        sections.append("❌ SECURITY ISSUES FOUND:\n" + "".join(f"  - {issue}\n" for issue in security_issues))
+    else:
+        sections.append("✅ No security issues found\n")
+    if test_issues:
+        sections.append("❌ INTEGRATION TESTS FAILED:\n" + "".join(f"  - {issue}\n" for issue in test_issues))
+    else:
+        sections.append("✅ All integration tests passed\n")
+    if timings:
+        sections.append(test_integration.format_timings(timings))
+    return "\n".join(section.rstrip("\n") + "\n" for section in sections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every skill check against one index")
+    parser.add_argument("skills_dir", nargs="?", default="skills")
+    parser.add_argument("--cache-dir", help="Reuse results for unchanged files and skills across runs")
+    parser.add_argument("--jobs", type=int, help="Parallel scan, schema and syntax check workers (default: one per CPU)")
+    parser.add_argument("--schemas", help="Validate skill.json files against the schemas in this directory")
+    parser.add_argument("--registry", help="Also validate this registry.json (requires --schemas)")
+    parser.add_argument("--report", default="/tmp/validation-report.txt")
+    args = parser.parse_args()
+    if args.registry and not args.schemas:
+        parser.error("--registry requires --schemas")
+
+    skills_dir = Path(args.skills_dir)
+
+    if not skills_dir.exists():
+        print("No skills directory found")
+        sys.exit(0)
+
+    report, failed = run_checks(skills_dir, args.cache_dir, args.jobs, args.schemas, args.registry)
+    Path(args.report).write_text(report)
+    print(report)
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
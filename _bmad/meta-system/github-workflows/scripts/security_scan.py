@@ -1,12 +1,25 @@
 #!/usr/bin/env python3
 """
 Security scan for submitted skills
+
+All rules are compiled into one alternation and matched in a single pass per
+file. Large files are memory-mapped, binary and oversized files are flagged
+instead of scanned, and files are fanned out across a process pool.
+Scripts come from a shared SkillIndex, so content already read by another
+check is not read again. With --cache-dir, files whose content is unchanged
+since the last run reuse their previous findings.
 """
 
 import os
 import sys
 import re
+import mmap
+import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from skill_index import FileEntry, SkillIndex
+from validation_cache import ValidationCache, rules_fingerprint
 
 # Patterns that indicate potential security issues
 DANGEROUS_PATTERNS = [
@@ -23,6 +36,8 @@ DANGEROUS_PATTERNS = [
     (r"secret\s*=\s*['\"]", "Hardcoded secrets"),
 ]
 
+URL_PATTERN = r"https?://[^\s'\"<>]+"
+
 # Allowed external domains
 ALLOWED_DOMAINS = [
     "raw.githubusercontent.com",
@@ -30,41 +45,203 @@ ALLOWED_DOMAINS = [
     "api.github.com",
 ]
 
-def scan_file(filepath):
-    """Scan a file for security issues"""
+SCANNED_SUFFIXES = {".py", ".sh", ".js"}
+MAX_FILE_SIZE = 10 * 1024 * 1024   # Larger files are reported, not scanned
+MMAP_THRESHOLD = 1024 * 1024       # Map files from this size instead of reading them
+BINARY_SNIFF_SIZE = 8192
+PARALLEL_MIN_FILES = 64            # Below this a process pool costs more than it saves
+
+
+def _combine(patterns):
+    """Compile one case-insensitive alternation that finds any of `patterns`
+
+    When every pattern starts with a plain character, the alternation is
+    led by a case-sensitive class of those characters: the regex engine then
+    skips ahead with a fast character scan instead of trying every branch
+    at every offset. Matches are only candidates; callers confirm the rule.
+    """
+    if all(p[0].isalnum() or p[0] == "_" for p in patterns) and \
+            not any(p[1:2] in ("?", "*", "+", "{") for p in patterns):
+        firsts = sorted({c for p in patterns for c in (p[0].lower(), p[0].upper())})
+        branches = "|".join(f"(?<={re.escape(p[0])}){p[1:]}" for p in patterns)
+        return re.compile(f"[{re.escape(''.join(firsts))}](?i:{branches})".encode())
+    return re.compile("|".join(f"(?:{p})" for p in patterns).encode(), re.IGNORECASE)
+
+
+RULES = [re.compile(pattern.encode(), re.IGNORECASE) for pattern, _ in DANGEROUS_PATTERNS]
+# Case-sensitive, like the URL check has always been
+URL_RULE = re.compile(URL_PATTERN.encode())
+COMBINED = _combine([pattern for pattern, _ in DANGEROUS_PATTERNS] + [URL_PATTERN])
+
+
+def _newlines(content, start, end):
+    if isinstance(content, bytes):
+        return content.count(b"\n", start, end)
+    return content[start:end].count(b"\n")
+
+
+def find_matches(content):
+    """Yield (rule index or "url", offset, match) for every rule hit in one pass
+
+    The combined pattern finds the leftmost candidate; every rule is then
+    matched at that offset, and the search resumes one byte later so
+    overlapping hits (e.g. a token inside a URL) are not lost. URLs do not
+    overlap each other: one starting inside the previous URL is not reported.
+    """
+    pos = 0
+    url_end = 0
+    while True:
+        match = COMBINED.search(content, pos)
+        if not match:
+            return
+        start = match.start()
+        for i, rule in enumerate(RULES):
+            hit = rule.match(content, start)
+            if hit:
+                yield i, start, hit
+        hit = URL_RULE.match(content, start) if start >= url_end else None
+        if hit:
+            url_end = hit.end()
+            yield "url", start, hit
+        pos = start + 1
+
+
+def _format_lines(lines):
+    if len(lines) == 1:
+        return f"line {lines[0]}"
+    return f"lines {', '.join(str(line) for line in lines)}"
+
+
+def scan_content(name, content):
+    """Scan file content (bytes or mmap) for security issues"""
     issues = []
+    rule_lines = {}
+    url_hits = []
 
-    try:
-        content = filepath.read_text()
-    except:
-        return issues
+    line, last = 1, 0
+    for rule, start, hit in find_matches(content):
+        line += _newlines(content, last, start)
+        last = start
+        if rule == "url":
+            url_hits.append((hit.group().decode("utf-8", "replace"), line))
+        elif line not in rule_lines.setdefault(rule, []):
+            rule_lines[rule].append(line)
 
-    for pattern, message in DANGEROUS_PATTERNS:
-        if re.search(pattern, content, re.IGNORECASE):
-            issues.append(f"{filepath.name}: {message}")
+    for rule, (_, message) in enumerate(DANGEROUS_PATTERNS):
+        if rule in rule_lines:
+            issues.append(f"{name}: {message} ({_format_lines(rule_lines[rule])})")
 
     # Check for external URLs
-    urls = re.findall(r'https?://[^\s\'"<>]+', content)
-    for url in urls:
+    for url, line in url_hits:
         domain = url.split("/")[2] if "/" in url else ""
         if domain and domain not in ALLOWED_DOMAINS:
-            issues.append(f"{filepath.name}: External URL {url} (not in whitelist)")
+            issues.append(f"{name}: External URL {url} (not in whitelist, line {line})")
 
     return issues
 
+
+def scan_bytes(name, content):
+    """Scan file content, flagging binary files instead of matching them"""
+    if not content:
+        return []
+    if b"\0" in content[:BINARY_SNIFF_SIZE]:
+        return [f"{name}: Binary content in script file"]
+    return scan_content(name, content)
+
+
+def scan_file(filepath):
+    """Scan a file for security issues"""
+    filepath = Path(filepath)
+
+    try:
+        with open(filepath, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > MAX_FILE_SIZE:
+                return [f"{filepath.name}: File too large to scan ({size / 1024 / 1024:.1f}MB)"]
+            if size < MMAP_THRESHOLD:
+                return scan_bytes(filepath.name, f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return scan_bytes(filepath.name, content)
+    except OSError:
+        return []
+
+
+def scan_entry(entry):
+    """Scan an indexed file, sharing its already-read content with other checks"""
+    if entry.size >= MMAP_THRESHOLD:
+        return scan_file(entry.path)
+    try:
+        return scan_bytes(entry.name, entry.read_bytes())
+    except OSError:
+        return []
+
+
+def open_cache(directory):
+    """Cache for scan results, invalidated whenever the rules change"""
+    fingerprint = rules_fingerprint(
+        DANGEROUS_PATTERNS, URL_PATTERN, ALLOWED_DOMAINS, MAX_FILE_SIZE, sources=[__file__]
+    )
+    return ValidationCache(directory, "security_scan", fingerprint)
+
+
+def scan_many(entries, jobs=None):
+    """Scan indexed files, in parallel for large batches; returns {path: issues}"""
+    if jobs == 1 or len(entries) < PARALLEL_MIN_FILES:
+        return {entry.path: scan_entry(entry) for entry in entries}
+    paths = [entry.path for entry in entries]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        chunksize = max(1, len(paths) // ((jobs or os.cpu_count() or 1) * 8))
+        return dict(zip(paths, pool.map(scan_file, paths, chunksize=chunksize)))
+
+
+def scan_files(files, jobs=None, cache=None):
+    """Scan files (paths or indexed FileEntry objects), in parallel for large batches
+
+    Returns issues in path order.
+    """
+    entries = sorted(
+        (f if isinstance(f, FileEntry) else FileEntry(str(f), os.path.basename(f), os.stat(f)) for f in files),
+        key=lambda entry: entry.path,
+    )
+    findings = {}
+    signatures = {}
+    if cache and cache.enabled:
+        for entry in entries:
+            signatures[entry.path] = cache.file_signature(entry.path, entry.st)
+            previous = cache.lookup(entry.path, signatures[entry.path])
+            if previous is not None:
+                findings[entry.path] = previous
+    pending = [entry for entry in entries if entry.path not in findings]
+    findings.update(scan_many(pending, jobs))
+
+    if signatures:
+        for entry in pending:
+            cache.store(entry.path, signatures[entry.path], findings[entry.path])
+    return [issue for entry in entries for issue in findings[entry.path]]
+
+
+def check_index(index, jobs=None, cache=None):
+    """Scan every script in a SkillIndex; returns the issues found"""
+    scripts = [entry for entry in index.files() if entry.suffix in SCANNED_SUFFIXES]
+    return scan_files(scripts, jobs, cache)
+
+
 def main():
-    skills_dir = Path("skills")
+    parser = argparse.ArgumentParser(description="Security scan for submitted skills")
+    parser.add_argument("skills_dir", nargs="?", default="skills")
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--cache-dir", help="Reuse findings for unchanged files across runs")
+    args = parser.parse_args()
+
+    skills_dir = Path(args.skills_dir)
 
     if not skills_dir.exists():
         print("No skills directory")
         sys.exit(0)
 
-    all_issues = []
-
-    for skill_path in skills_dir.rglob("*"):
-        if skill_path.is_file() and skill_path.suffix in [".py", ".sh", ".js"]:
-            issues = scan_file(skill_path)
-            all_issues.extend(issues)
+    cache = open_cache(args.cache_dir)
+    all_issues = check_index(SkillIndex.build(skills_dir), args.jobs, cache)
+    cache.save()
 
     if all_issues:
         print("❌ SECURITY ISSUES FOUND:")
@@ -76,4 +253,4 @@ def main():
         sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Skill tree index shared by the skill CI checks
+
+One os.scandir-based walk records every file under `skills/` with its size,
+mode and mtime (one stat per file). File contents are read lazily on first
+use and kept, so checks that look at the same SKILL.md or script share one
+read. validate_skills.py, security_scan.py and test_integration.py all take
+a SkillIndex; run_checks.py runs every check against a single index.
+"""
+
+import os
+import stat
+from pathlib import Path
+
+# Contents of larger files are re-read on demand instead of kept in memory
+KEEP_CONTENT_LIMIT = 1024 * 1024
+
+
+class FileEntry:
+    __slots__ = ("path", "relpath", "name", "suffix", "st", "_content")
+
+    def __init__(self, path, relpath, st):
+        self.path = path
+        self.relpath = relpath
+        self.name = os.path.basename(path)
+        self.suffix = os.path.splitext(self.name)[1]
+        self.st = st
+        self._content = None
+
+    @property
+    def size(self):
+        return self.st.st_size
+
+    @property
+    def mode(self):
+        return self.st.st_mode
+
+    @property
+    def executable(self):
+        """Any execute bit set (what os.access(X_OK) reports for the file owner)"""
+        return bool(self.st.st_mode & (stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH))
+
+    def read_bytes(self):
+        if self._content is not None:
+            return self._content
+        with open(self.path, "rb") as f:
+            content = f.read()
+        if len(content) <= KEEP_CONTENT_LIMIT:
+            self._content = content
+        return content
+
+    def read_text(self):
+        return self.read_bytes().decode("utf-8")
+
+
+class SkillEntry:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.name = self.path.name
+        self.files = []
+        self._by_relpath = {}
+
+    def add(self, entry):
+        self.files.append(entry)
+        self._by_relpath[entry.relpath] = entry
+
+    def file(self, relpath):
+        """The file at `relpath` inside the skill, or None"""
+        return self._by_relpath.get(relpath)
+
+    def files_in(self, subdir):
+        """Files directly inside `subdir` (e.g. "scripts")"""
+        prefix = subdir + os.sep
+        return [f for f in self.files if f.relpath.startswith(prefix) and os.sep not in f.relpath[len(prefix):]]
+
+    @property
+    def total_size(self):
+        return sum(f.size for f in self.files)
+
+
+class SkillIndex:
+    def __init__(self, skills_dir):
+        self.skills_dir = Path(skills_dir)
+        self.skills = []
+        self.loose_files = []
+
+    @classmethod
+    def build(cls, skills_dir):
+        """Walk `skills_dir` once; each top-level directory is a skill"""
+        index = cls(skills_dir)
+        with os.scandir(skills_dir) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_dir(follow_symlinks=False):
+                    skill = SkillEntry(entry.path)
+                    _walk(entry.path, "", skill)
+                    index.skills.append(skill)
+                elif entry.is_file():
+                    index.loose_files.append(FileEntry(entry.path, entry.name, entry.stat()))
+        return index
+
+    def __iter__(self):
+        return iter(self.skills)
+
+    def files(self):
+        """Every indexed file, skills first in name order"""
+        for skill in self.skills:
+            yield from skill.files
+        yield from self.loose_files
+
+
+def _walk(directory, relative, skill):
+    with os.scandir(directory) as entries:
+        for entry in sorted(entries, key=lambda e: e.name):
+            relpath = os.path.join(relative, entry.name) if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                _walk(entry.path, relpath, skill)
+            elif entry.is_file():
+                skill.add(FileEntry(entry.path, relpath, entry.stat()))
+
+
+def index_skill(skill_path):
+    """Index a single skill directory"""
+    skill = SkillEntry(skill_path)
+    if Path(skill_path).is_dir():
+        _walk(str(skill_path), "", skill)
+    return skill
@@ -1,21 +1,102 @@
 #!/usr/bin/env python3
 """
 Integration tests for skills
+
+Script syntax is checked in one batch for all skills that need testing:
+Python scripts are compiled in-process with compile() (on a process pool for
+large batches) and shell scripts are checked with `bash -n`, several at a
+time. Per-script timings are listed with the results.
 """
 
 import os
 import sys
+import time
+import argparse
 import subprocess
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import skill_index
+from skill_index import SkillEntry, SkillIndex, index_skill
+from validation_cache import ValidationCache, rules_fingerprint
+
+SCRIPT_SUFFIXES = [".py", ".sh"]
+SHELL_TIMEOUT = 5
+PARALLEL_MIN_SCRIPTS = 64   # Below this a process pool costs more than it saves
+
+def compile_python(path, source=None):
+    """Compile a Python script without running it or writing bytecode; returns (error, seconds)"""
+    started = time.perf_counter()
+    try:
+        if source is None:
+            with open(path, "rb") as f:
+                source = f.read()
+        compile(source, path, "exec", dont_inherit=True)
+        error = None
+    except (SyntaxError, ValueError, OSError):
+        error = "syntax error"
+    except (RecursionError, MemoryError):
+        # Pathologically nested or long expressions: fail this file, not the whole run
+        error = "syntax error (too deeply nested or too large to compile)"
+    return error, time.perf_counter() - started
+
+def check_shell(path):
+    """Parse a shell script with `bash -n`; returns (error, seconds)"""
+    started = time.perf_counter()
+    try:
+        result = subprocess.run(["bash", "-n", path], capture_output=True, timeout=SHELL_TIMEOUT)
+        error = "syntax error" if result.returncode != 0 else None
+    except Exception as e:
+        error = f"test failed: {e}"
+    return error, time.perf_counter() - started
+
+def check_syntax(scripts, jobs=None):
+    """Syntax-check indexed scripts in one batch; returns {path: (error, seconds)}
+
+    Shell checks run on a thread pool (at most `jobs` bash processes at a
+    time) while Python scripts compile, in this process for small batches
+    and on a process pool for large ones.
+    """
+    python = [script for script in scripts if script.suffix == ".py"]
+    shell = [script.path for script in scripts if script.suffix == ".sh"]
+    workers = jobs or os.cpu_count() or 1
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as shell_pool:
+        shell_results = shell_pool.map(check_shell, shell)
 
-def test_skill(skill_path):
-    """Test a single skill"""
+        if jobs == 1 or len(python) < PARALLEL_MIN_SCRIPTS:
+            for script in python:
+                try:
+                    source = script.read_bytes()
+                except OSError:
+                    source = None
+                results[script.path] = compile_python(script.path, source)
+        else:
+            paths = [script.path for script in python]
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                chunksize = max(1, len(paths) // (workers * 8))
+                results.update(zip(paths, pool.map(compile_python, paths, chunksize=chunksize)))
+
+        results.update(zip(shell, shell_results))
+    return results
+
+def skill_scripts(skill):
+    return [script for script in skill.files_in("scripts") if script.suffix in SCRIPT_SUFFIXES]
+
+def test_skill(skill_path, syntax=None):
+    """Test a single skill (a directory path or an indexed SkillEntry)
+
+    `syntax` holds check_syntax() results for the skill's scripts when they
+    were checked in a batch; otherwise they are checked here.
+    """
     issues = []
-    skill_name = skill_path.name
+    skill = skill_path if isinstance(skill_path, SkillEntry) else index_skill(skill_path)
+    skill_name = skill.name
 
     # Check if SKILL.md can be parsed
-    skill_md = skill_path / "SKILL.md"
-    if not skill_md.exists():
+    skill_md = skill.file("SKILL.md")
+    if skill_md is None:
         issues.append(f"{skill_name}: No SKILL.md")
         return issues
 
@@ -29,59 +110,101 @@ def test_skill(skill_path):
         issues.append(f"{skill_name}: No Overview")
 
     # Test scripts if they exist
-    scripts_dir = skill_path / "scripts"
-    if scripts_dir.exists():
-        for script in scripts_dir.glob("*"):
-            if script.suffix in [".py", ".sh"]:
-                # Check if executable
-                if not os.access(script, os.X_OK):
-                    issues.append(f"{skill_name}: {script.name} not executable")
-
-                # Try to execute (dry run)
-                try:
-                    if script.suffix == ".py":
-                        result = subprocess.run(
-                            ["python3", "-m", "py_compile", str(script)],
-                            capture_output=True,
-                            timeout=5
-                        )
-                        if result.returncode != 0:
-                            issues.append(f"{skill_name}: {script.name} syntax error")
-                    elif script.suffix == ".sh":
-                        result = subprocess.run(
-                            ["bash", "-n", str(script)],
-                            capture_output=True,
-                            timeout=5
-                        )
-                        if result.returncode != 0:
-                            issues.append(f"{skill_name}: {script.name} syntax error")
-                except Exception as e:
-                    issues.append(f"{skill_name}: {script.name} test failed: {e}")
+    scripts = skill_scripts(skill)
+    if syntax is None:
+        syntax = check_syntax(scripts, jobs=1)
+
+    for script in scripts:
+        # Check if executable
+        if not script.executable:
+            issues.append(f"{skill_name}: {script.name} not executable")
+
+        # Syntax check (dry run)
+        error, _ = syntax[script.path]
+        if error:
+            issues.append(f"{skill_name}: {script.name} {error}")
 
     return issues
 
+def open_cache(directory):
+    """Cache for test results, invalidated whenever the tests change"""
+    fingerprint = rules_fingerprint(sources=[__file__, skill_index.__file__])
+    return ValidationCache(directory, "test_integration", fingerprint)
+
+def check_index(index, cache=None, jobs=None, timings=None):
+    """Test every skill in a SkillIndex; returns the issues found
+
+    Scripts of all skills not served from the cache are syntax-checked in
+    one batch. Pass a dict as `timings` to collect {script path: seconds}.
+    """
+    cache = cache or open_cache(None)
+    findings = {}
+    signatures = {}
+
+    if cache.enabled:
+        for skill in index:
+            signatures[skill.path] = cache.skill_signature(skill)
+            previous = cache.lookup(skill.path, signatures[skill.path])
+            if previous is not None:
+                findings[skill.path] = previous
+    pending = [skill for skill in index if skill.path not in findings]
+
+    syntax = check_syntax([script for skill in pending for script in skill_scripts(skill)], jobs)
+    if timings is not None:
+        timings.update((path, seconds) for path, (_, seconds) in syntax.items())
+
+    for skill in pending:
+        findings[skill.path] = test_skill(skill, syntax)
+        if cache.enabled:
+            cache.store(skill.path, signatures[skill.path], findings[skill.path])
+
+    return [issue for skill in index for issue in findings[skill.path]]
+
+def format_timings(timings, limit=10):
+    """Per-script syntax check times, slowest first (`limit` 0 lists all)"""
+    if not timings:
+        return ""
+    ranked = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+    shown = ranked[:limit] if limit else ranked
+    lines = [f"⏱️ SYNTAX CHECKS: {len(ranked)} scripts, {sum(timings.values()):.2f}s total"]
+    lines.extend(f"  {seconds * 1000:8.1f}ms  {path}" for path, seconds in shown)
+    if len(shown) < len(ranked):
+        lines.append(f"  ... {len(ranked) - len(shown)} more")
+    return "\n".join(lines) + "\n"
+
 def main():
-    skills_dir = Path("skills")
+    parser = argparse.ArgumentParser(description="Integration tests for skills")
+    parser.add_argument("skills_dir", nargs="?", default="skills")
+    parser.add_argument("--cache-dir", help="Reuse results for unchanged skills across runs")
+    parser.add_argument("--jobs", type=int, help="Parallel syntax checks (default: one per CPU)")
+    parser.add_argument("--timings", type=int, default=10, metavar="N",
+                        help="List the N slowest scripts (0 lists all)")
+    args = parser.parse_args()
+
+    skills_dir = Path(args.skills_dir)
 
     if not skills_dir.exists():
         print("No skills directory")
         sys.exit(0)
 
-    all_issues = []
-
-    for skill_path in skills_dir.iterdir():
-        if skill_path.is_dir():
-            issues = test_skill(skill_path)
-            all_issues.extend(issues)
+    cache = open_cache(args.cache_dir)
+    timings = {}
+    all_issues = check_index(SkillIndex.build(skills_dir), cache, args.jobs, timings)
+    cache.save()
 
     if all_issues:
         print("❌ INTEGRATION TESTS FAILED:")
         for issue in all_issues:
             print(f"  - {issue}")
-        sys.exit(1)
     else:
         print("✅ All integration tests passed")
-        sys.exit(0)
+
+    report = format_timings(timings, args.timings)
+    if report:
+        print()
+        print(report, end="")
+
+    sys.exit(1 if all_issues else 0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
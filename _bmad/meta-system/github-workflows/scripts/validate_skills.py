@@ -1,33 +1,50 @@
 #!/usr/bin/env python3
 """
 GitHub Actions: Validate submitted skills
+
+With --schemas, every skill's skill.json (and --registry's registry.json) is
+also validated against the bundled JSON schemas. The schemas are compiled
+once (once per worker for large batches) and errors carry JSON paths.
 """
 
 import os
 import sys
-import yaml
 import json
+import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import json_schema
+import skill_index
+from skill_index import SkillEntry, SkillIndex, index_skill
+from validation_cache import ValidationCache, rules_fingerprint
+
+REQUIRED_SECTIONS = ["## Overview", "## Purpose", "## Capabilities"]
+MAX_SKILL_SIZE = 10 * 1024 * 1024  # 10MB
+SCHEMA_FILES = {"skill": "skill.json", "registry": "registry.json"}
+PARALLEL_MIN_MANIFESTS = 64   # Below this a process pool costs more than it saves
+
+# Compiled schemas of this process, keyed like SCHEMA_FILES
+_compiled = {}
 
 def validate_skill(skill_path):
-    """Validate a single skill"""
+    """Validate a single skill (a directory path or an indexed SkillEntry)"""
     errors = []
     warnings = []
 
-    skill_path = Path(skill_path)
-    skill_name = skill_path.name
+    skill = skill_path if isinstance(skill_path, SkillEntry) else index_skill(skill_path)
+    skill_name = skill.name
 
     # Check SKILL.md
-    skill_md = skill_path / "SKILL.md"
-    if not skill_md.exists():
+    skill_md = skill.file("SKILL.md")
+    if skill_md is None:
         errors.append(f"{skill_name}: Missing SKILL.md")
         return errors, warnings
 
     content = skill_md.read_text()
 
     # Check required sections
-    required = ["## Overview", "## Purpose", "## Capabilities"]
-    for section in required:
+    for section in REQUIRED_SECTIONS:
         if section not in content:
             errors.append(f"{skill_name}: Missing {section}")
 
@@ -38,15 +55,11 @@ def validate_skill(skill_path):
     if "http://" in content:
         warnings.append(f"{skill_name}: Uses http instead of https")
 
-    # Check directory structure
-    for subdir in ["scripts", "references", "assets"]:
-        if (skill_path / subdir).exists():
-            # Check for executable permissions on scripts
-            if subdir == "scripts":
-                for script in (skill_path / subdir).glob("*"):
-                    if script.suffix in [".sh", ".py"]:
-                        if not os.access(script, os.X_OK):
-                            warnings.append(f"{skill_name}: {subdir}/{script.name} not executable")
+    # Check for executable permissions on scripts
+    for script in skill.files_in("scripts"):
+        if script.suffix in [".sh", ".py"]:
+            if not script.executable:
+                warnings.append(f"{skill_name}: scripts/{script.name} not executable")
 
     # Check for absolute paths in SKILL.md
     lines = content.split("\n")
@@ -55,45 +68,161 @@ def validate_skill(skill_path):
             errors.append(f"{skill_name}: Line {i} has absolute path")
 
     # Check file size
-    total_size = sum(f.stat().st_size for f in skill_path.rglob("*") if f.is_file())
-    if total_size > 10 * 1024 * 1024:  # 10MB
+    total_size = skill.total_size
+    if total_size > MAX_SKILL_SIZE:
         warnings.append(f"{skill_name}: Large size ({total_size / 1024 / 1024:.1f}MB)")
 
     return errors, warnings
 
+def load_schemas(schemas_dir):
+    """Schema documents found in schemas_dir, keyed like SCHEMA_FILES"""
+    schemas = {}
+    for kind, filename in SCHEMA_FILES.items():
+        path = Path(schemas_dir) / filename
+        if path.exists():
+            schemas[kind] = json.loads(path.read_text())
+    return schemas
+
+def _compile_schemas(schemas):
+    global _compiled
+    _compiled = {kind: json_schema.Schema(schema) for kind, schema in schemas.items()}
+
+def check_manifest(kind, label, content):
+    """Validate one JSON document against the compiled `kind` schema"""
+    try:
+        document = json.loads(content)
+    except ValueError as e:
+        return [f"{label}: Invalid JSON ({e})"]
+    return [f"{label} {path}: {message}" for path, message in _compiled[kind].errors(document)]
+
+def validate_manifests(manifests, schemas, jobs=None):
+    """Validate (kind, label, content) manifests; returns their error lists in order"""
+    if jobs == 1 or len(manifests) < PARALLEL_MIN_MANIFESTS:
+        _compile_schemas(schemas)
+        return [check_manifest(*manifest) for manifest in manifests]
+
+    kinds, labels, contents = zip(*manifests)
+    workers = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_compile_schemas, initargs=(schemas,)) as pool:
+        chunksize = max(1, len(manifests) // (workers * 8))
+        return list(pool.map(check_manifest, kinds, labels, contents, chunksize=chunksize))
+
+def validate_registry(registry_path, schemas):
+    """Validate a registry file against the registry schema; returns (errors, warnings)
+
+    Without a registry schema the registry is skipped with a warning.
+    """
+    label = Path(registry_path).name
+    if "registry" not in (schemas or {}):
+        return [], [f"{label}: No {SCHEMA_FILES['registry']} schema found, registry not validated"]
+    try:
+        content = Path(registry_path).read_bytes()
+    except OSError as e:
+        return [f"{label}: Cannot read registry ({e.strerror or e})"], []
+    return validate_manifests([("registry", label, content)], schemas, jobs=1)[0], []
+
+def open_cache(directory, schemas=None):
+    """Cache for validation results, invalidated whenever the rules or schemas change"""
+    fingerprint = rules_fingerprint(
+        REQUIRED_SECTIONS, MAX_SKILL_SIZE, schemas,
+        sources=[__file__, skill_index.__file__, json_schema.__file__],
+    )
+    return ValidationCache(directory, "validate_skills", fingerprint)
+
+def validate_pending(skills, schemas=None, jobs=None):
+    """Validate indexed skills, schema-checking their skill.json files in one batch
+
+    Returns {skill path: (errors, warnings)}.
+    """
+    findings = {skill.path: validate_skill(skill) for skill in skills}
+
+    if schemas and "skill" in schemas:
+        manifests = []
+        for skill in skills:
+            manifest = skill.file("skill.json")
+            if manifest is None:
+                findings[skill.path][0].append(f"{skill.name}: Missing skill.json")
+            else:
+                manifests.append((skill, ("skill", f"{skill.name}: skill.json", manifest.read_bytes())))
+        results = validate_manifests([manifest for _, manifest in manifests], schemas, jobs)
+        for (skill, _), errors in zip(manifests, results):
+            findings[skill.path][0].extend(errors)
+
+    return findings
+
+def check_index(index, cache=None, schemas=None, jobs=None):
+    """Validate every skill in a SkillIndex; returns (errors, warnings)
+
+    With `schemas` (see load_schemas), the skill.json of every skill not
+    served from the cache is schema-checked in one batch.
+    """
+    cache = cache or open_cache(None, schemas)
+    findings = {}
+    signatures = {}
+
+    if cache.enabled:
+        for skill in index:
+            signatures[skill.path] = cache.skill_signature(skill)
+            previous = cache.lookup(skill.path, signatures[skill.path])
+            if previous is not None:
+                findings[skill.path] = previous
+    pending = [skill for skill in index if skill.path not in findings]
+    findings.update(validate_pending(pending, schemas, jobs))
+
+    if cache.enabled:
+        for skill in pending:
+            cache.store(skill.path, signatures[skill.path], findings[skill.path])
+
+    all_errors = [error for skill in index for error in findings[skill.path][0]]
+    all_warnings = [warning for skill in index for warning in findings[skill.path][1]]
+    return all_errors, all_warnings
+
+def format_report(all_errors, all_warnings):
+    lines = []
+    if all_errors:
+        lines.append("❌ ERRORS:")
+        lines.extend(f"  - {error}" for error in all_errors)
+        lines.append("")
+
+    if all_warnings:
+        lines.append("⚠️ WARNINGS:")
+        lines.extend(f"  - {warning}" for warning in all_warnings)
+        lines.append("")
+
+    if not all_errors and not all_warnings:
+        lines.append("✅ All validations passed!")
+
+    return "\n".join(lines) + "\n"
+
 def main():
-    skills_dir = Path("skills")
+    parser = argparse.ArgumentParser(description="Validate submitted skills")
+    parser.add_argument("skills_dir", nargs="?", default="skills")
+    parser.add_argument("--cache-dir", help="Reuse results for unchanged skills across runs")
+    parser.add_argument("--schemas", help="Validate skill.json files against the schemas in this directory")
+    parser.add_argument("--registry", help="Also validate this registry.json (requires --schemas)")
+    parser.add_argument("--jobs", type=int, help="Schema validation worker processes (default: one per CPU)")
+    args = parser.parse_args()
+    if args.registry and not args.schemas:
+        parser.error("--registry requires --schemas")
+
+    skills_dir = Path(args.skills_dir)
 
     if not skills_dir.exists():
         print("No skills directory found")
         sys.exit(0)
 
-    all_errors = []
-    all_warnings = []
-
-    for skill_path in skills_dir.iterdir():
-        if skill_path.is_dir():
-            errors, warnings = validate_skill(skill_path)
-            all_errors.extend(errors)
-            all_warnings.extend(warnings)
+    schemas = load_schemas(args.schemas) if args.schemas else None
+    cache = open_cache(args.cache_dir, schemas)
+    all_errors, all_warnings = check_index(SkillIndex.build(skills_dir), cache, schemas, args.jobs)
+    cache.save()
+    if args.registry:
+        registry_errors, registry_warnings = validate_registry(args.registry, schemas)
+        all_errors.extend(registry_errors)
+        all_warnings.extend(registry_warnings)
 
     # Write report
     report_path = Path("/tmp/validation-report.txt")
-    with open(report_path, "w") as f:
-        if all_errors:
-            f.write("❌ ERRORS:\n")
-            for error in all_errors:
-                f.write(f"  - {error}\n")
-            f.write("\n")
-
-        if all_warnings:
-            f.write("⚠️ WARNINGS:\n")
-            for warning in all_warnings:
-                f.write(f"  - {warning}\n")
-            f.write("\n")
-
-        if not all_errors and not all_warnings:
-            f.write("✅ All validations passed!\n")
+    report_path.write_text(format_report(all_errors, all_warnings))
 
     print(report_path.read_text())
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Incremental validation cache for the skill CI scripts
+
+Each check keeps its previous findings in `<cache-dir>/<check>.json`, keyed
+by file or skill path together with a content signature. Unchanged files and
+skills reuse their findings instead of being re-checked. File hashes are
+reused while size and mtime are unchanged, and content hashes (not mtimes)
+decide whether something changed, so caches survive fresh CI checkouts.
+The whole cache is dropped when the check's rules or code change.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+
+from skill_index import SkillEntry, index_skill
+
+CACHE_FORMAT = 1
+
+
+def rules_fingerprint(*rules, sources=()):
+    """Hash of a check's rule data and source files; any change invalidates its cache"""
+    digest = hashlib.sha256(f"format {CACHE_FORMAT}".encode())
+    for rule in rules:
+        digest.update(repr(rule).encode("utf-8"))
+    for source in sources:
+        digest.update(Path(source).read_bytes())
+    return digest.hexdigest()
+
+
+class ValidationCache:
+    def __init__(self, directory, check, fingerprint):
+        self.path = Path(directory) / f"{check}.json" if directory else None
+        self.fingerprint = fingerprint
+        self.files = {}
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._seen = set()
+        self._seen_files = set()
+
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                if data.get("rules") == fingerprint:
+                    self.files = data.get("files", {})
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError):
+                pass
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def file_signature(self, path, st=None):
+        """SHA-256 of a file, rehashed only when its size or mtime changed"""
+        path = str(path)
+        st = st or os.stat(path)
+        self._seen_files.add(path)
+        known = self.files.get(path)
+        if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            return known[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        self.files[path] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+        return self.files[path][2]
+
+    def skill_signature(self, skill):
+        """Signature over every file in a skill: relative path, mode and content
+
+        `skill` is a SkillEntry from skill_index (its recorded stats are
+        reused) or a skill directory path.
+        """
+        if not isinstance(skill, SkillEntry):
+            skill = index_skill(skill)
+        digest = hashlib.sha256()
+        for entry in skill.files:
+            # Bytecode caches appear as a side effect of checking the scripts
+            if "__pycache__" in entry.relpath.split(os.sep):
+                continue
+            signature = self.file_signature(entry.path, entry.st)
+            digest.update(f"{entry.relpath}\0{entry.mode:o}\0{signature}\0".encode())
+        return digest.hexdigest()
+
+    def lookup(self, key, signature):
+        """Previous findings for `key` if its signature is unchanged, else None"""
+        key = str(key)
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        if entry and entry["signature"] == signature:
+            self.hits += 1
+            return entry["findings"]
+        self.misses += 1
+        return None
+
+    def store(self, key, signature, findings):
+        self.entries[str(key)] = {"signature": signature, "findings": findings}
+
+    def cached(self, key, signature, compute):
+        """Findings for `key`: reused while `signature()` matches, else `compute()`d and stored"""
+        if not self.enabled:
+            return compute()
+
+        current = signature()
+        findings = self.lookup(key, current)
+        if findings is None:
+            findings = compute()
+            self.store(key, current, findings)
+        return findings
+
+    def save(self):
+        """Write the cache, dropping entries for files and skills that no longer exist"""
+        if not self.enabled:
+            return
+        self.entries = {key: entry for key, entry in self.entries.items() if key in self._seen}
+        self.files = {path: known for path, known in self.files.items() if path in self._seen_files}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"rules": self.fingerprint, "files": self.files, "entries": self.entries}, f)
+        os.replace(tmp, self.path)
+
+        print(f"Cache: {self.hits} unchanged, {self.misses} checked", file=sys.stderr)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Watch skills and re-run only the checks affected by each change
+
+Keeps the skill tree and every finding in memory and polls the tree with
+os.scandir and stat, reading nothing from files that did not change. When
+a skill changes, only that skill is re-validated, only its changed files
+are re-scanned and only its changed scripts are syntax-checked. The
+diagnostics that appeared or were fixed are printed as soon as they are
+known, or streamed as one JSON object per change with --json (for editors).
+
+Usage:
+  python3 watch_skills.py skills/ [--schemas DIR] [--interval 0.5] [--json]
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+import run_checks
+import security_scan
+import test_integration
+import validate_skills
+from skill_index import FileEntry, index_skill
+
+# Finding kinds, in report order
+KINDS = ("error", "warning", "security", "test")
+LABELS = {"error": "errors", "warning": "warnings", "security": "security issues", "test": "test failures"}
+
+
+def _signature(st):
+    """What has to change for a file to be checked again"""
+    return (st.st_mtime_ns, st.st_size, st.st_mode, st.st_ino)
+
+
+class SkillState:
+    __slots__ = ("entry", "signature", "findings")
+
+    def __init__(self, entry, signature, findings):
+        self.entry = entry
+        self.signature = signature
+        self.findings = findings
+
+
+class SkillWatcher:
+    """In-memory findings for a skills tree, updated incrementally by poll()"""
+
+    def __init__(self, skills_dir, schemas=None, jobs=None):
+        self.skills_dir = Path(skills_dir)
+        self.schemas = schemas
+        self.jobs = jobs
+        self.skills = {}
+        self.loose = {}
+        # Per-file results, reused while a file's signature is unchanged
+        self._scans = {}
+        self._syntax = {}
+
+    def findings(self):
+        """Every current finding as (kind, message), skills in name order"""
+        for path in sorted(self.skills):
+            yield from self.skills[path].findings
+        for path in sorted(self.loose):
+            yield from self.loose[path][1]
+
+    def totals(self):
+        totals = dict.fromkeys(KINDS, 0)
+        for kind, _ in self.findings():
+            totals[kind] += 1
+        return totals
+
+    def poll(self):
+        """Re-check whatever changed since the last poll
+
+        Returns (changed skill names, appeared findings, fixed findings), or
+        None when nothing changed.
+        """
+        try:
+            with os.scandir(self.skills_dir) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except FileNotFoundError:
+            entries = []
+
+        dirs, loose = [], {}
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            elif entry.is_file():
+                loose[entry.path] = FileEntry(entry.path, entry.name, entry.stat())
+
+        changed = []
+        for path in dirs:
+            try:
+                skill = index_skill(path)
+            except OSError:
+                continue   # Removed while walking; the next poll sees it gone
+            signature = {f.relpath: _signature(f.st) for f in skill.files}
+            state = self.skills.get(path)
+            if state is None or state.signature != signature:
+                changed.append((skill, signature))
+        present = set(dirs)
+        removed = [path for path in self.skills if path not in present]
+        loose_changed = [
+            entry for path, entry in loose.items()
+            if path not in self.loose or self.loose[path][0] != _signature(entry.st)
+        ]
+        loose_removed = [path for path in self.loose if path not in loose]
+
+        if not (changed or removed or loose_changed or loose_removed):
+            return None
+
+        before = set()
+        for skill, _ in changed:
+            if str(skill.path) in self.skills:
+                before.update(self.skills[str(skill.path)].findings)
+        for path in removed:
+            before.update(self.skills.pop(path).findings)
+        for path in loose_removed + [entry.path for entry in loose_changed]:
+            if path in self.loose:
+                before.update(self.loose.pop(path)[1])
+        self._forget(removed, loose_removed)
+
+        after = self._check(changed, loose_changed)
+        current = set(after)
+        appeared = [finding for finding in after if finding not in before]
+        fixed = [finding for finding in sorted(before) if finding not in current]
+        names = [skill.name for skill, _ in changed] + [Path(path).name for path in removed]
+        names += [entry.name for entry in loose_changed] + [Path(path).name for path in loose_removed]
+        return names, appeared, fixed
+
+    def _forget(self, removed_skills, removed_loose):
+        """Drop per-file results of files that no longer exist"""
+        gone = set(removed_loose)
+        prefixes = tuple(path + os.sep for path in removed_skills)
+        for results in (self._scans, self._syntax):
+            for path in [path for path in results if path in gone or (prefixes and path.startswith(prefixes))]:
+                del results[path]
+
+    def _check(self, changed, loose_changed):
+        """Run the checks for changed skills and loose files; returns their findings"""
+        signatures = {}
+        scan, scripts = [], []
+        for skill, signature in changed:
+            for entry in skill.files:
+                signatures[entry.path] = signature[entry.relpath]
+            for entry in skill.files:
+                if entry.suffix in security_scan.SCANNED_SUFFIXES and self._stale(self._scans, entry, signatures):
+                    scan.append(entry)
+            for entry in test_integration.skill_scripts(skill):
+                if self._stale(self._syntax, entry, signatures):
+                    scripts.append(entry)
+        for entry in loose_changed:
+            signatures[entry.path] = _signature(entry.st)
+            if entry.suffix in security_scan.SCANNED_SUFFIXES:
+                scan.append(entry)
+
+        for path, issues in security_scan.scan_many(scan, self.jobs).items():
+            self._scans[path] = (signatures[path], issues)
+        for path, result in test_integration.check_syntax(scripts, self.jobs).items():
+            self._syntax[path] = (signatures[path], result)
+        validation = validate_skills.validate_pending([skill for skill, _ in changed], self.schemas, self.jobs)
+
+        after = []
+        for skill, signature in changed:
+            path = str(skill.path)
+            # Files deleted from a skill that is still there
+            if path in self.skills:
+                self._forget_files(self.skills[path].signature, signature, path)
+            errors, warnings = validation[skill.path]
+            syntax = {entry.path: self._syntax[entry.path][1] for entry in test_integration.skill_scripts(skill)}
+            findings = [("error", error) for error in errors] + [("warning", warning) for warning in warnings]
+            findings += [("security", issue) for entry in skill.files if entry.path in self._scans
+                         for issue in self._scans[entry.path][1]]
+            findings += [("test", issue) for issue in test_integration.test_skill(skill, syntax)]
+            self.skills[path] = SkillState(skill, signature, findings)
+            after.extend(findings)
+        for entry in loose_changed:
+            issues = self._scans.get(entry.path, (None, []))[1]
+            self.loose[entry.path] = (signatures[entry.path], [("security", issue) for issue in issues])
+            after.extend(self.loose[entry.path][1])
+        return after
+
+    def _forget_files(self, old_signature, new_signature, skill_path):
+        for relpath in old_signature.keys() - new_signature.keys():
+            path = os.path.join(skill_path, relpath)
+            self._scans.pop(path, None)
+            self._syntax.pop(path, None)
+
+    @staticmethod
+    def _stale(results, entry, signatures):
+        known = results.get(entry.path)
+        return known is None or known[0] != signatures[entry.path]
+
+    def report(self):
+        """Full report of the current findings, as run_checks.py prints it"""
+        by_kind = {kind: [] for kind in KINDS}
+        for kind, message in self.findings():
+            by_kind[kind].append(message)
+        return run_checks.format_report(by_kind["error"], by_kind["warning"], by_kind["security"], by_kind["test"])
+
+
+def format_totals(totals):
+    return ", ".join(f"{totals[kind]} {LABELS[kind]}" for kind in KINDS)
+
+
+def print_change(names, appeared, fixed, totals, elapsed):
+    stamp = datetime.now().strftime("%H:%M:%S")
+    shown = ", ".join(names[:3]) + (f" and {len(names) - 3} more" if len(names) > 3 else "")
+    print(f"[{stamp}] {shown} changed, checked in {elapsed * 1000:.0f} ms")
+    for kind, message in appeared:
+        print(f"  {'⚠️' if kind == 'warning' else '❌'} {message}")
+    for kind, message in fixed:
+        print(f"  ✅ fixed: {message}")
+    print(f"  {format_totals(totals)}", flush=True)
+
+
+def emit_json(names, appeared, fixed, totals, elapsed):
+    print(json.dumps({
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "changed": names,
+        "appeared": [{"kind": kind, "message": message} for kind, message in appeared],
+        "fixed": [{"kind": kind, "message": message} for kind, message in fixed],
+        "totals": totals,
+        "ms": round(elapsed * 1000, 1),
+    }), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run skill checks on every change")
+    parser.add_argument("skills_dir", nargs="?", default="skills")
+    parser.add_argument("--schemas", help="Validate skill.json files against the schemas in this directory")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between polls (default 0.5)")
+    parser.add_argument("--jobs", type=int, help="Parallel workers for large batches (default: one per CPU)")
+    parser.add_argument("--json", action="store_true", help="Stream one JSON object per change")
+    args = parser.parse_args()
+
+    schemas = validate_skills.load_schemas(args.schemas) if args.schemas else None
+    watcher = SkillWatcher(args.skills_dir, schemas, args.jobs)
+    emit = emit_json if args.json else print_change
+
+    started = time.perf_counter()
+    first = watcher.poll()
+    elapsed = time.perf_counter() - started
+    if args.json:
+        names, appeared, fixed = first or ([], [], [])
+        emit(names, appeared, fixed, watcher.totals(), elapsed)
+    else:
+        print(watcher.report())
+        print(f"Watching {len(watcher.skills)} skills in {args.skills_dir} "
+              f"(first check {elapsed:.2f}s); Ctrl-C to stop", flush=True)
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            started = time.perf_counter()
+            change = watcher.poll()
+            if change:
+                emit(*change, watcher.totals(), time.perf_counter() - started)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,11 @@
  * - Generate improvements
  * - Apply evolution
  *
+ * Invocations are appended to $CACHE_DIR/metrics, one fixed-schema line each
+ * (see templates/composite-skill/scripts/metrics_store.py, which also compacts
+ * the log into rollups); the analysis reads the rollups plus the open segments.
+ * The segment length is the one recorded in rollups.json, shared with Python.
+ *
  * Usage: Node.js MCP server (stdio transport)
  */
 
@@ -15,6 +20,7 @@ const { Server } = require("@modelcontextprotocol/sdk/server");
 const { StdioServerTransport } = require("@modelcontextprotocol/sdk/server/stdio");
 const fs = require("fs");
 const path = require("path");
+const { spawn } = require("child_process");
 
 const server = new Server({
   name: "mas-evolution-v2",
@@ -33,6 +39,21 @@ if (!fs.existsSync(CACHE_DIR)) {
 
 const METRICS_FILE = path.join(CACHE_DIR, "usage-metrics.json");
 const OPTIMIZATION_FILE = path.join(CACHE_DIR, "optimization-data.json");
+const METRICS_DIR = path.join(CACHE_DIR, "metrics");
+const ROLLUPS_FILE = path.join(METRICS_DIR, "rollups.json");
+// Segment length used only if no writer has recorded one in rollups.json yet
+const DEFAULT_SEGMENT_SECONDS = 3600;
+let segmentSeconds = null;
+const SEGMENT_PATTERN = /^invocations-(\d+)\.log$/;
+const METRICS_STORE = path.join(__dirname, "..", "templates", "composite-skill", "scripts", "metrics_store.py");
+// Compact once more segments than this are waiting (checked at most once a minute)
+const MAX_OPEN_SEGMENTS = 3;
+const COMPACT_CHECK_MS = 60 * 1000;
+let lastCompactCheck = 0;
+
+if (!fs.existsSync(METRICS_DIR)) {
+  fs.mkdirSync(METRICS_DIR, { recursive: true });
+}
 
 // Helper: Read metrics
 function readMetrics() {
@@ -102,49 +123,162 @@ function writeOptimizationData(data) {
   fs.writeFileSync(OPTIMIZATION_FILE, JSON.stringify(data, null, 2));
 }
 
-// Helper: Record invocation
+// Helper: Record invocation (one appended line; never reads or rewrites history)
 function recordInvocation(skillName, success, executionTime, tokensUsed, error = null) {
-  const metrics = readMetrics();
+  const now = Date.now() / 1000;
+  const seconds = sharedSegmentSeconds();
+  const start = Math.floor(now / seconds) * seconds;
+  const record = [
+    Math.round(now * 1000) / 1000,
+    skillName,
+    Boolean(success),
+    executionTime,
+    tokensUsed,
+    error ? String(error).slice(0, 500) : null
+  ];
+  fs.appendFileSync(path.join(METRICS_DIR, `invocations-${start}.log`), JSON.stringify(record) + "\n");
+  maybeCompact();
+}
 
-  metrics.total_invocations += 1;
+// Helper: The directory's segment length, recording ours if no writer has yet
+// (metrics_store.py does the same, so both agree on segment boundaries)
+function sharedSegmentSeconds() {
+  if (segmentSeconds) {
+    return segmentSeconds;
+  }
+  if (!fs.existsSync(ROLLUPS_FILE)) {
+    const tmp = path.join(METRICS_DIR, `.rollups-${process.pid}.tmp`);
+    fs.writeFileSync(tmp, JSON.stringify({
+      version: 1,
+      segment_seconds: DEFAULT_SEGMENT_SECONDS,
+      total_invocations: 0,
+      skills: {},
+      windows: {},
+      failed_requests: [],
+      compacted: []
+    }));
+    try {
+      fs.linkSync(tmp, ROLLUPS_FILE);  // Publishes only if no other writer got there first
+    } catch (error) {
+      if (error.code !== "EEXIST") {
+        throw error;
+      }
+    } finally {
+      fs.unlinkSync(tmp);
+    }
+  }
+  segmentSeconds = readRollups().segment_seconds || DEFAULT_SEGMENT_SECONDS;
+  return segmentSeconds;
+}
 
-  if (!metrics.skills[skillName]) {
-    metrics.skills[skillName] = {
-      invocations: 0,
-      success_count: 0,
-      error_count: 0,
-      total_execution_time: 0,
-      total_tokens: 0,
-      errors: []
-    };
+// Helper: Fold sealed segments into the rollups in the background once they pile up
+function maybeCompact() {
+  const now = Date.now();
+  if (now - lastCompactCheck < COMPACT_CHECK_MS) {
+    return;
   }
+  lastCompactCheck = now;
 
-  const skill = metrics.skills[skillName];
-  skill.invocations += 1;
-
-  if (success) {
-    skill.success_count += 1;
-    skill.total_execution_time += executionTime;
-    skill.total_tokens += tokensUsed;
-  } else {
-    skill.error_count += 1;
-    if (error) {
-      skill.errors.push({
-        timestamp: new Date().toISOString(),
-        error: error,
-        execution_time: executionTime
-      });
+  const segments = fs.readdirSync(METRICS_DIR).filter(file => SEGMENT_PATTERN.test(file)).length;
+  if (segments <= MAX_OPEN_SEGMENTS || !fs.existsSync(METRICS_STORE)) {
+    return;
+  }
+  const child = spawn(process.env.MAS_PYTHON || "python3", [METRICS_STORE, "compact", "--dir", METRICS_DIR], {
+    stdio: "ignore",
+    detached: true
+  });
+  child.on("error", () => {});  // No Python: segments wait for the orchestrator's compaction
+  child.unref();
+}
 
-      metrics.failed_requests.push({
-        timestamp: new Date().toISOString(),
-        skill: skillName,
-        error: error,
-        requested_capability: extractCapability(error)
-      });
+// Helper: Read compacted rollups
+function readRollups() {
+  try {
+    return JSON.parse(fs.readFileSync(ROLLUPS_FILE, "utf8"));
+  } catch {
+    return { total_invocations: 0, skills: {}, failed_requests: [], compacted: [] };
+  }
+}
+
+// Helper: Invocation metrics (legacy metrics file + rollups + segments not yet compacted)
+function readUsage() {
+  const metrics = readMetrics();
+  const rollups = readRollups();
+  const compacted = new Set(rollups.compacted);
+
+  const skillEntry = (name) => {
+    if (!metrics.skills[name]) {
+      metrics.skills[name] = {
+        invocations: 0,
+        success_count: 0,
+        error_count: 0,
+        total_execution_time: 0,
+        total_tokens: 0,
+        errors: []
+      };
     }
+    return metrics.skills[name];
+  };
+
+  for (const [name, data] of Object.entries(rollups.skills)) {
+    const skill = skillEntry(name);
+    skill.invocations += data.invocations;
+    skill.success_count += data.success_count;
+    skill.error_count += data.error_count;
+    skill.total_execution_time += data.total_execution_time;
+    skill.total_tokens += data.total_tokens;
+    skill.errors.push(...data.errors);
+  }
+  metrics.total_invocations += rollups.total_invocations;
+  for (const request of rollups.failed_requests) {
+    metrics.failed_requests.push({ ...request, requested_capability: extractCapability(request.error) });
   }
 
-  writeMetrics(metrics);
+  const segments = fs.readdirSync(METRICS_DIR)
+    .map(file => SEGMENT_PATTERN.exec(file))
+    .filter(match => match && !compacted.has(Number(match[1])))
+    .sort((a, b) => Number(a[1]) - Number(b[1]));
+
+  for (const match of segments) {
+    let text;
+    try {
+      text = fs.readFileSync(path.join(METRICS_DIR, match[0]), "utf8");
+    } catch {
+      continue;  // Compacted meanwhile
+    }
+    for (const line of text.split("\n")) {
+      let record;
+      try {
+        record = JSON.parse(line);
+      } catch {
+        continue;  // Blank, or still being written
+      }
+      const [ts, skillName, success, executionTime, tokensUsed, error] = record;
+      const skill = skillEntry(skillName);
+      metrics.total_invocations += 1;
+      skill.invocations += 1;
+
+      if (success) {
+        skill.success_count += 1;
+        skill.total_execution_time += executionTime;
+        skill.total_tokens += tokensUsed;
+      } else {
+        skill.error_count += 1;
+        if (error) {
+          const timestamp = new Date(ts * 1000).toISOString();
+          skill.errors.push({ timestamp, error, execution_time: executionTime });
+          metrics.failed_requests.push({
+            timestamp,
+            skill: skillName,
+            error,
+            requested_capability: extractCapability(error)
+          });
+        }
+      }
+    }
+  }
+
+  return metrics;
 }
 
 // Helper: Extract capability from error
@@ -160,7 +294,7 @@ function extractCapability(error) {
 
 // Helper: Analyze usage patterns
 function analyzeUsagePatterns() {
-  const metrics = readMetrics();
+  const metrics = readUsage();
   const patterns = {
     frequent_skills: [],
     failed_skills: [],
@@ -285,13 +419,13 @@ function generateSuggestions(patterns) {
 
 // Helper: Apply optimization
 function applyOptimization(skillName, metric) {
-  const metrics = readMetrics();
+  const usage = readUsage();
 
-  if (!metrics.skills[skillName]) {
+  if (!usage.skills[skillName]) {
     return { success: false, error: "Skill not found" };
   }
 
-  const skill = metrics.skills[skillName];
+  const skill = usage.skills[skillName];
 
   // Simulate optimization
   let improvement = {};
@@ -331,6 +465,7 @@ function applyOptimization(skillName, metric) {
   writeOptimizationData(optimizationData);
 
   // Update metrics
+  const metrics = readMetrics();
   metrics.improvements_executed += 1;
   metrics.improvement_history.push({
     timestamp: new Date().toISOString(),
@@ -366,8 +501,9 @@ server.addTool({
       args.error || null
     );
 
-    const metrics = readMetrics();
-    const skill = metrics.skills[args.skillName];
+    // Only the compacted rollups: re-reading the open segments would cost O(history) per call
+    const rollups = readRollups();
+    const skill = rollups.skills[args.skillName];
 
     return {
       content: [{
@@ -375,12 +511,14 @@ server.addTool({
         text: `📊 Metrics Tracked\n\n` +
               `Skill: ${args.skillName}\n` +
               `Status: ${args.success ? "✅ Success" : "❌ Failed"}\n` +
-              `Invocations: ${skill.invocations}\n` +
-              `Success Rate: ${((skill.success_count / skill.invocations) * 100).toFixed(1)}%\n` +
               (args.executionTime ? `Execution Time: ${args.executionTime}s\n` : "") +
               (args.tokensUsed ? `Tokens Used: ${args.tokensUsed}\n` : "") +
               (args.error ? `Error: ${args.error}\n` : "") +
-              `\nTotal System Invocations: ${metrics.total_invocations}`
+              (skill
+                ? `\nCompacted History: ${skill.invocations} invocations, ` +
+                  `${((skill.success_count / skill.invocations) * 100).toFixed(1)}% success\n`
+                : "") +
+              `Total System Invocations (compacted): ${rollups.total_invocations}`
       }]
     };
   }
@@ -669,6 +807,7 @@ async function main() {
   console.error(`Project root: ${PROJECT_ROOT}`);
   console.error(`Cache directory: ${CACHE_DIR}`);
   console.error(`Metrics file: ${METRICS_FILE}`);
+  console.error(`Metrics log: ${METRICS_DIR}`);
 }
 
 main().catch((error) => {
@@ -2,10 +2,27 @@
 """
 Skill: skill-name
 Purpose: [What this script does]
+
+Usage:
+  python main.py <input.json>
+  python main.py --batch [records.ndjson|-] [--batch-size N]
+
+Batch mode reads NDJSON (one JSON record per line) from a file or stdin,
+hands records to process_batch in groups of --batch-size, and writes one
+compact JSON result per input line as each batch completes. Records that
+are not valid JSON or fail validate_input yield {"error": ..., "line": N}
+in their place, and the exit status is 1 if there were any.
 """
 
 import sys
 import json
+import argparse
+from itertools import islice
+
+
+BATCH_SIZE = 1000
+
+encode = json.JSONEncoder(separators=(",", ":")).encode
 
 
 def process_input(input_data):
@@ -22,21 +39,96 @@ def process_input(input_data):
     pass
 
 
+def process_batch(records):
+    """
+    Process several records at once (override with a vectorized version)
+
+    Args:
+        records: List of validated records
+
+    Returns:
+        List with one result per record, in the same order
+    """
+    return [process_input(record) for record in records]
+
+
 def validate_input(data):
     """Validate input data"""
     # TODO: Add validation logic
     return True
 
 
+def read_records(stream):
+    """Yield (line number, record, error) for each non-blank NDJSON line"""
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if validate_input(record):
+            yield number, record, None
+        else:
+            yield number, None, "Invalid input"
+
+
+def process_stream(stream, out, batch_size=BATCH_SIZE):
+    """Process NDJSON records from `stream` in batches; returns the number of rejected records"""
+    records = read_records(stream)
+    rejected = 0
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return rejected
+
+        valid = [record for _, record, error in batch if error is None]
+        results = process_batch(valid)
+        if len(results) != len(valid):
+            raise ValueError(f"process_batch returned {len(results)} results for {len(valid)} records")
+
+        results = iter(results)
+        lines = []
+        for number, _, error in batch:
+            if error is None:
+                lines.append(encode(next(results)))
+            else:
+                lines.append(encode({"error": error, "line": number}))
+                rejected += 1
+        out.write("\n".join(lines) + "\n")
+        out.flush()
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="skill-name")
+    parser.add_argument("input", nargs="?", help="JSON file (NDJSON with --batch; default stdin)")
+    parser.add_argument("--batch", action="store_true", help="Process NDJSON records in batches")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Records per process_batch call (default: {BATCH_SIZE})")
+    args = parser.parse_args()
+
+    if not args.batch and not args.input:
         print("Usage: python main.py <input>")
+        print("       python main.py --batch [records.ndjson|-] [--batch-size N]")
+        sys.exit(1)
+    if args.batch_size < 1:
+        print("--batch-size must be at least 1", file=sys.stderr)
         sys.exit(1)
-
-    input_file = sys.argv[1]
 
     try:
-        with open(input_file, 'r') as f:
+        if args.batch:
+            if args.input in (None, "-"):
+                rejected = process_stream(sys.stdin, sys.stdout, args.batch_size)
+            else:
+                with open(args.input, 'r') as f:
+                    rejected = process_stream(f, sys.stdout, args.batch_size)
+            if rejected:
+                print(f"{rejected} invalid record(s)", file=sys.stderr)
+                sys.exit(1)
+            sys.exit(0)
+
+        with open(args.input, 'r') as f:
             data = json.load(f)
 
         if validate_input(data):
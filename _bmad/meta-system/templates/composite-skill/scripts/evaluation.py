@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Demand-driven evaluation for composite workflows
+
+A Schedule decides which steps run and when. Steps are demanded starting
+from the workflow outputs (lazy evaluation) or all at once (eager). A
+demanded step first waits for the steps its `when` condition reads. If the
+condition fails, the step is skipped and its inputs are never demanded.
+Otherwise its inputs are demanded, and the step becomes ready once they have
+run or been skipped. A step whose inputs were all skipped is skipped too.
+
+WorkflowMemo memoizes sub-workflow calls by workflow name and input hash
+for one run, so recursive compositions evaluate a repeated sub-workflow once.
+"""
+
+import re
+import threading
+from concurrent.futures import Future
+
+from step_cache import hash_input
+
+
+EVALUATION_MODES = ("eager", "lazy")
+
+# Compositions whose outputs are usually a subset of their steps
+LAZY_COMPOSITIONS = ("conditional", "recursive")
+
+CONDITION_KEYS = {"step", "equals", "in", "matches", "not"}
+
+
+def compile_condition(spec, where):
+    """Turn a `when` spec into (guard step or None for the workflow input, predicate)"""
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where}: 'when' must be an object")
+    unknown = sorted(set(spec) - CONDITION_KEYS)
+    if unknown:
+        raise ValueError(f"{where}: unknown condition key '{unknown[0]}'")
+    tests = [key for key in ("equals", "in", "matches") if key in spec]
+    if len(tests) > 1:
+        raise ValueError(f"{where}: use only one of equals, in, matches")
+
+    if "equals" in spec:
+        expected = spec["equals"]
+        test = lambda value: value == expected
+    elif "in" in spec:
+        options = list(spec["in"])
+        test = lambda value: value in options
+    elif "matches" in spec:
+        pattern = re.compile(spec["matches"])
+        test = lambda value: pattern.search(value if isinstance(value, str) else str(value)) is not None
+    else:
+        test = bool
+
+    if spec.get("not", False):
+        return spec.get("step"), lambda value: not test(value)
+    return spec.get("step"), test
+
+
+def select_outputs(names, results, first=False):
+    """Outputs of the listed steps that ran: the value itself if only one did, else keyed by step
+
+    With `first`, only the first listed step that ran counts.
+    """
+    ran = [name for name in names if name in results]
+    if ran and (first or len(ran) == 1):
+        return results[ran[0]]['output']
+    if not ran:
+        return None
+    return {name: results[name]['output'] for name in ran}
+
+
+class Schedule:
+    """Demand-driven launch order for one workflow run"""
+
+    def __init__(self, order, dependencies, conditions, demand):
+        self.order = order
+        self.dependencies = dependencies
+        self.conditions = conditions
+        self.state = {}
+        self.resolved = set()
+        self.skipped = set()
+        for name in demand:
+            self.demand(name)
+
+    def demand(self, name):
+        """Mark a step as needed, along with whatever it must wait for"""
+        if name in self.state:
+            return
+        if name in self.conditions:
+            self.state[name] = "condition"
+            guard, _ = self.conditions[name]
+            if guard:
+                self.demand(guard)
+        else:
+            self._demand_inputs(name)
+
+    def _demand_inputs(self, name):
+        self.state[name] = "inputs"
+        for upstream in self.dependencies[name]:
+            self.demand(upstream)
+
+    def resolve(self, name):
+        """Record that a launched step has a result"""
+        self.resolved.add(name)
+
+    def _skip(self, name, read):
+        self.state[name] = "skipped"
+        self.skipped.add(name)
+        self.resolved.add(name)
+        # A skipped step never reads its inputs
+        for upstream in self.dependencies[name]:
+            read(upstream)
+
+    def advance(self, input_data, results, read):
+        """Yield steps ready to launch, evaluating conditions and skips on the way
+
+        `read(step)` is called after a condition has consumed a step's output,
+        and for each input of a skipped step, which will never read it.
+        The caller may resolve yielded steps immediately (cache hits).
+        """
+        progress = True
+        while progress:
+            progress = False
+            for name in self.order:
+                state = self.state.get(name)
+                if state == "condition":
+                    guard, test = self.conditions[name]
+                    if guard is None:
+                        holds = test(input_data)
+                    elif guard not in self.resolved:
+                        continue
+                    else:
+                        holds = guard not in self.skipped and test(results[guard]['output'])
+                        read(guard)
+                    if holds:
+                        self._demand_inputs(name)
+                    else:
+                        print(f"\n  ↷ {name} skipped (condition not met)")
+                        self._skip(name, read)
+                    progress = True
+                elif state == "inputs":
+                    inputs = self.dependencies[name]
+                    if not all(upstream in self.resolved for upstream in inputs):
+                        continue
+                    if inputs and all(upstream in self.skipped for upstream in inputs):
+                        print(f"\n  ↷ {name} skipped (no inputs ran)")
+                        self._skip(name, read)
+                    else:
+                        self.state[name] = "launched"
+                        yield name
+                    progress = True
+
+
+class WorkflowMemo:
+    """Sub-workflow results of one run, keyed by workflow name and input hash"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(workflow, data):
+        return f"{workflow}:{hash_input(data)}"
+
+    def run(self, key, compute):
+        """Result of `compute()` for `key`; concurrent callers of one key share a single run"""
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if owner:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result(), not owner
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
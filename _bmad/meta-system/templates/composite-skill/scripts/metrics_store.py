@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Metrics Store
+Append-only invocation metrics with periodic compaction into rollups
+
+Each skill invocation is one fixed-schema record, a JSON array of FIELDS
+appended to the segment log of the period it is written in
+(`invocations-<start>.log`). A write never reads existing metrics. Records
+are buffered and written with a single O_APPEND write per flush, so
+concurrent writers, including the evolution MCP server, never overwrite each
+other. The segment length is recorded once per directory in `rollups.json`
+by the first writer, and every writer uses it, so they agree on segment
+boundaries.
+
+Compaction folds sealed segments into `rollups.json` and deletes them:
+
+- all-time counters per skill
+- per-segment windows for the retention period
+- a latency histogram (LATENCY_BUCKETS) for p50/p95/p99
+- the last few errors per skill and failed requests, bounded
+
+Queries combine the rollups with the still-open segments, which are read
+incrementally, so their cost is bounded by the retention and the segment
+length, not by the history.
+
+Usage:
+  python metrics_store.py summary [--dir DIR] [--since HOURS] [--skill NAME]
+  python metrics_store.py compact [--dir DIR]
+"""
+
+import os
+import copy
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import threading
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single compacting process is assumed
+    fcntl = None
+
+
+# One record: [epoch seconds, skill, success, execution seconds, tokens, error or null]
+FIELDS = ("ts", "skill", "ok", "seconds", "tokens", "error")
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10, 25, 60, 120, 300)
+
+ROLLUPS_VERSION = 1
+SEGMENT_SECONDS = 3600
+RETENTION_DAYS = 31
+# A segment is compacted this long after its period ended (late buffered writes)
+SEAL_GRACE = 60
+ERROR_SAMPLES = 20
+FAILED_REQUESTS = 200
+ERROR_LENGTH = 500
+
+
+def default_directory():
+    """`<CACHE_DIR>/metrics`, where the evolution MCP server reads and writes"""
+    cache_dir = os.environ.get("CACHE_DIR") or Path(
+        os.environ.get("MAS_PROJECT_ROOT", os.getcwd())) / "_bmad" / "_cache"
+    return Path(cache_dir) / "metrics"
+
+
+def _timestamp(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+
+
+class Rollup:
+    """Counters and latency histogram for one skill over some period
+
+    Execution time and latency cover successful invocations only.
+    """
+
+    __slots__ = ("invocations", "success_count", "error_count",
+                 "total_execution_time", "total_tokens", "histogram")
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.invocations = data.get("invocations", 0)
+        self.success_count = data.get("success_count", 0)
+        self.error_count = data.get("error_count", 0)
+        self.total_execution_time = data.get("total_execution_time", 0.0)
+        self.total_tokens = data.get("total_tokens", 0)
+        self.histogram = list(data.get("histogram") or [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def add(self, ok, seconds, tokens):
+        self.invocations += 1
+        if ok:
+            self.success_count += 1
+            self.total_execution_time += seconds
+            self.total_tokens += tokens
+            self.histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        else:
+            self.error_count += 1
+
+    def merge(self, other):
+        self.invocations += other.invocations
+        self.success_count += other.success_count
+        self.error_count += other.error_count
+        self.total_execution_time += other.total_execution_time
+        self.total_tokens += other.total_tokens
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        return self
+
+    def percentile(self, q):
+        """Latency at quantile `q` (0-1), interpolated within its histogram bucket"""
+        total = sum(self.histogram)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            if count and seen + count >= rank:
+                low = LATENCY_BUCKETS[i - 1] if i else 0.0
+                high = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else low * 2
+                return round(low + (high - low) * (rank - seen) / count, 6)
+            seen += count
+        return LATENCY_BUCKETS[-1]
+
+    def to_dict(self):
+        return {
+            "invocations": self.invocations,
+            "success_count": self.success_count,
+            "error_count": self.error_count,
+            "total_execution_time": round(self.total_execution_time, 6),
+            "total_tokens": self.total_tokens,
+            "histogram": self.histogram,
+        }
+
+    def summary(self):
+        """Counters plus success rate, mean and percentile latencies (seconds)"""
+        summary = self.to_dict()
+        del summary["histogram"]
+        summary.update(
+            success_rate=round(self.success_count / self.invocations, 4) if self.invocations else None,
+            avg_time=round(self.total_execution_time / self.success_count, 6) if self.success_count else None,
+            p50=self.percentile(0.5),
+            p95=self.percentile(0.95),
+            p99=self.percentile(0.99),
+        )
+        return summary
+
+
+class SegmentTail:
+    """Records of one open segment, folded incrementally as the file grows"""
+
+    def __init__(self):
+        self.offset = 0
+        self.skills = {}
+        self.errors = []
+
+    def read(self, path):
+        """Fold the complete lines appended since the last read"""
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        # A line without its newline is still being written
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                ts, skill, ok, seconds, tokens, error = json.loads(line)
+            except (ValueError, TypeError):
+                continue
+            self.skills.setdefault(skill, Rollup()).add(ok, seconds or 0.0, tokens or 0)
+            if not ok and error:
+                self.errors.append((ts, skill, error, seconds))
+        self.offset += end
+        return self
+
+
+class MetricsStore:
+    """Per-skill invocation metrics in a directory of segment logs and rollups"""
+
+    def __init__(self, directory=None, segment_seconds=SEGMENT_SECONDS, retention_days=RETENTION_DAYS,
+                 flush_records=256, flush_seconds=1.0, compact_seconds=300):
+        self.directory = Path(directory) if directory else default_directory()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_seconds = segment_seconds
+        self.retention = retention_days * 86400
+        self.flush_records = flush_records
+        self.flush_seconds = flush_seconds
+        self.compact_seconds = compact_seconds
+        self.recorded = 0
+        self.flushes = 0
+        self.compactions = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._last_compact = 0.0
+        self._lock = threading.Lock()
+        self._rollups = None
+        self._rollups_signature = None
+        self._tails = {}
+        # A directory keeps the segment length it was created with
+        self.segment_seconds = self._shared_segment_seconds()
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a store from the composite `metrics` settings"""
+        return cls(
+            directory=config.get("directory"),
+            segment_seconds=config.get("segment_seconds", SEGMENT_SECONDS),
+            retention_days=config.get("retention_days", RETENTION_DAYS),
+            flush_records=config.get("flush_records", 256),
+            flush_seconds=config.get("flush_seconds", 1.0),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def rollups_path(self):
+        return self.directory / "rollups.json"
+
+    def _segment_path(self, start):
+        return self.directory / f"invocations-{start}.log"
+
+    def _segment_start(self, ts):
+        return int(ts // self.segment_seconds * self.segment_seconds)
+
+    def _segments(self):
+        """Segment start -> path, for every segment log on disk"""
+        segments = {}
+        for path in self.directory.glob("invocations-*.log"):
+            try:
+                segments[int(path.stem.split("-", 1)[1])] = path
+            except ValueError:
+                continue
+        return segments
+
+    def _shared_segment_seconds(self):
+        """The directory's segment length, recording ours if no writer has yet"""
+        if not self.rollups_path.exists():
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self._read_rollups(), f, separators=(",", ":"))
+                # link() publishes the file only if it does not exist yet
+                os.link(tmp, self.rollups_path)
+            except FileExistsError:
+                pass   # Another writer recorded its length first
+            finally:
+                os.unlink(tmp)
+        return self._read_rollups().get("segment_seconds") or self.segment_seconds
+
+    # ---------- Writing ----------
+
+    def record(self, skill, success, seconds, tokens=0, error=None, ts=None):
+        """Append one invocation; written at the next flush"""
+        if error is not None:
+            error = str(error)[:ERROR_LENGTH]
+        record = [round(time.time() if ts is None else ts, 3), skill, bool(success),
+                  round(seconds, 6), tokens, error]
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            self._buffer.append(line)
+            self.recorded += 1
+            due = (len(self._buffer) >= self.flush_records
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records in one append, then compact if it is time
+
+        Records go to the current segment whatever their timestamp, so a
+        segment is never appended to once it may have been compacted.
+        """
+        with self._lock:
+            buffer, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if buffer:
+            path = self._segment_path(self._segment_start(time.time()))
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, b"".join(buffer))
+            finally:
+                os.close(fd)
+            self.flushes += 1
+
+        if time.time() - self._last_compact >= self.compact_seconds:
+            self.compact()
+
+    def close(self):
+        self.flush()
+
+    # ---------- Compaction ----------
+
+    def compact(self, now=None):
+        """Fold sealed segments into the rollups and prune expired windows
+
+        Returns the number of segments folded, or None if another process
+        is compacting.
+        """
+        now = time.time() if now is None else now
+        self._last_compact = now
+        sealed = {start: path for start, path in self._segments().items()
+                  if start + self.segment_seconds + SEAL_GRACE <= now}
+        with self._compaction_lock() as locked:
+            if not locked:
+                return None
+            rollups = copy.deepcopy(self._read_rollups())
+            expired = now - self.retention
+            windows = rollups["windows"]
+            stale = [start for start in windows if int(start) < self._segment_start(expired)]
+            if not sealed and not stale:
+                return 0
+
+            compacted = set(rollups["compacted"])
+            # [bytes folded, mtime_ns, inode] per compacted segment, to spot one
+            # that was appended to or re-created after it was folded
+            folded_files = dict(rollups.get("folded_files", {}))
+            skills = {name: Rollup(data) for name, data in rollups["skills"].items()}
+            errors = {name: deque(data.get("errors", []), ERROR_SAMPLES) for name, data in rollups["skills"].items()}
+            failed = deque(rollups["failed_requests"], FAILED_REQUESTS)
+            folded = []
+            for start in sorted(sealed):
+                tail = SegmentTail()
+                try:
+                    st = sealed[start].stat()
+                except OSError:
+                    continue
+                if start in compacted:
+                    done = folded_files.get(str(start))
+                    if done is None or [st.st_size, st.st_mtime_ns, st.st_ino] == done:
+                        folded.append(start)   # Folded before, but not deleted
+                        continue
+                    if st.st_ino == done[2] and st.st_size > done[0]:
+                        tail.offset = done[0]   # Appended to since: fold only the rest
+                try:
+                    tail.read(sealed[start])
+                    st = sealed[start].stat()
+                except OSError:
+                    continue
+                window = windows.setdefault(str(start), {})
+                for name, rollup in tail.skills.items():
+                    skills.setdefault(name, Rollup()).merge(rollup)
+                    window[name] = Rollup(window.get(name)).merge(rollup).to_dict()
+                    rollups["total_invocations"] += rollup.invocations
+                for ts, name, error, seconds in tail.errors:
+                    errors.setdefault(name, deque(maxlen=ERROR_SAMPLES)).append(
+                        {"timestamp": _timestamp(ts), "error": error, "execution_time": seconds})
+                    failed.append({"timestamp": _timestamp(ts), "skill": name, "error": error})
+                compacted.add(start)
+                folded_files[str(start)] = [tail.offset, st.st_mtime_ns, st.st_ino]
+                folded.append(start)
+
+            for start in stale:
+                del windows[start]
+            rollups["skills"] = {
+                name: dict(rollup.to_dict(), errors=list(errors.get(name, ())))
+                for name, rollup in sorted(skills.items())
+            }
+            rollups["failed_requests"] = list(failed)
+            rollups["compacted"] = sorted(start for start in compacted if start >= self._segment_start(expired))
+            rollups["folded_files"] = {str(start): folded_files[str(start)]
+                                       for start in rollups["compacted"] if str(start) in folded_files}
+            rollups["updated"] = _timestamp(now)
+            self._write_rollups(rollups)
+            # Only now that the rollups are durable: a crash before this re-deletes, never re-counts.
+            # A segment that changed since it was read is kept for the next pass.
+            for start in folded:
+                try:
+                    st = sealed[start].stat()
+                    done = folded_files.get(str(start))
+                    if done is None or [st.st_size, st.st_mtime_ns, st.st_ino] == done:
+                        sealed[start].unlink()
+                except OSError:
+                    pass
+            with self._lock:
+                for start in folded:
+                    self._tails.pop(sealed[start], None)
+            self.compactions += 1
+            return len(folded)
+
+    @contextlib.contextmanager
+    def _compaction_lock(self):
+        """Yields whether this process may compact (non-blocking, released on exit)"""
+        fd = os.open(self.directory / ".compact.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    yield False
+                    return
+            yield True
+        finally:
+            os.close(fd)
+
+    def _read_rollups(self):
+        """rollups.json as stored (an empty one if missing or unreadable), cached by mtime; do not mutate"""
+        try:
+            st = os.stat(self.rollups_path)
+            signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            signature = None
+        if signature is None or signature != self._rollups_signature:
+            rollups = None
+            if signature is not None:
+                try:
+                    with open(self.rollups_path, "r") as f:
+                        rollups = json.load(f)
+                except (OSError, ValueError):
+                    pass
+            if not rollups or rollups.get("version") != ROLLUPS_VERSION:
+                rollups = {
+                    "version": ROLLUPS_VERSION,
+                    "segment_seconds": self.segment_seconds,
+                    "total_invocations": 0,
+                    "skills": {},
+                    "windows": {},
+                    "failed_requests": [],
+                    "compacted": [],
+                }
+            self._rollups, self._rollups_signature = rollups, signature
+        return self._rollups
+
+    def _write_rollups(self, rollups):
+        # Write to a temp file and rename so readers never see partial rollups
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(rollups, f, separators=(",", ":"))
+            os.replace(tmp, self.rollups_path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self._rollups_signature = None
+
+    # ---------- Queries ----------
+
+    def _open_tails(self, rollups):
+        """SegmentTails of the segments not yet folded into `rollups`, brought up to date"""
+        compacted = set(rollups["compacted"])
+        segments = self._segments()
+        for path in [path for path in self._tails if path not in segments.values()]:
+            del self._tails[path]
+        tails = {}
+        for start, path in segments.items():
+            if start in compacted:
+                continue
+            tail = self._tails.setdefault(path, SegmentTail())
+            try:
+                tail.read(path)
+            except OSError:
+                continue
+            tails[start] = tail
+        return tails
+
+    def skills(self, since=None, skill=None):
+        """Per-skill summaries (see Rollup.summary); `since` is epoch seconds, rounded down to a segment"""
+        self.flush()
+        with self._lock:
+            rollups = self._read_rollups()
+            tails = self._open_tails(rollups)
+        totals = {}
+        if since is None:
+            for name, data in rollups["skills"].items():
+                totals[name] = Rollup(data)
+        else:
+            first = self._segment_start(since)
+            for start, window in rollups["windows"].items():
+                if int(start) >= first:
+                    for name, data in window.items():
+                        totals.setdefault(name, Rollup()).merge(Rollup(data))
+        for start, tail in tails.items():
+            if since is None or start >= self._segment_start(since):
+                for name, rollup in tail.skills.items():
+                    totals.setdefault(name, Rollup()).merge(rollup)
+        return {
+            name: rollup.summary() for name, rollup in sorted(totals.items())
+            if skill is None or name == skill
+        }
+
+    def failed_requests(self, limit=None):
+        """Most recent failures, oldest first: {"timestamp", "skill", "error"}"""
+        self.flush()
+        with self._lock:
+            rollups = self._read_rollups()
+            tails = self._open_tails(rollups)
+        failed = list(rollups["failed_requests"])
+        for start in sorted(tails):
+            failed.extend({"timestamp": _timestamp(ts), "skill": name, "error": error}
+                          for ts, name, error, _ in tails[start].errors)
+        failed = failed[-FAILED_REQUESTS:]
+        return failed[-limit:] if limit else failed
+
+    def usage(self):
+        """All-time metrics in the shape of the evolution server's usage-metrics.json"""
+        summaries = self.skills()
+        failed = self.failed_requests()
+        with self._lock:
+            rollups = self._read_rollups()
+            tails = self._open_tails(rollups)
+        skills = {}
+        for name, summary in summaries.items():
+            errors = list(rollups["skills"].get(name, {}).get("errors", []))
+            for start in sorted(tails):
+                errors.extend({"timestamp": _timestamp(ts), "error": error, "execution_time": seconds}
+                              for ts, skill, error, seconds in tails[start].errors if skill == name)
+            skills[name] = dict(summary, errors=errors[-ERROR_SAMPLES:])
+        return {
+            "total_invocations": sum(summary["invocations"] for summary in summaries.values()),
+            "skills": skills,
+            "failed_requests": failed,
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "recorded": self.recorded,
+                "pending": len(self._buffer),
+                "flushes": self.flushes,
+                "compactions": self.compactions,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and compact skill invocation metrics")
+    parser.add_argument("command", choices=["summary", "compact"])
+    parser.add_argument("--dir", help="Metrics directory (default: $CACHE_DIR/metrics)")
+    parser.add_argument("--since", type=float, help="Only the last HOURS hours (summary)")
+    parser.add_argument("--skill", help="Only this skill (summary)")
+    args = parser.parse_args()
+
+    store = MetricsStore(args.dir, compact_seconds=float("inf"))
+    if args.command == "compact":
+        folded = store.compact()
+        print("Another process is compacting" if folded is None else f"Compacted {folded} segment(s)")
+        return
+
+    since = time.time() - args.since * 3600 if args.since else None
+    print(json.dumps(store.skills(since, args.skill), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,87 +2,785 @@
 """
 Composite Skill Orchestrator
 Coordinates multiple base skills into a workflow
+
+Steps form a dependency graph: each step may list the steps it consumes in
+`inputs`. Steps whose inputs are satisfied run concurrently on a thread or
+process pool; a step with several inputs waits for all of them (fan-in).
+Step results are cached by skill name, skill version and input hash.
+Linear pipelines can also run in streaming mode (--stream), pushing input
+chunks through the steps with constant memory. Every step is timed where it
+runs; --trace writes the spans as JSONL or Chrome trace events. With a
+worker pool (--workers), steps run the real skills' scripts/main.py in warm
+worker processes, or on remote worker nodes (--remote-workers, see
+remote_workers.py). Steps may exchange bytes/memoryview buffers; large buffers
+cross process boundaries as memory-mapped payloads instead of being pickled.
+A retention policy (--retention) bounds how much of each intermediate result
+is kept once its consumers have it. With a metrics store (`metrics`,
+--metrics-dir), every skill invocation is appended to the metrics log that
+feeds the evolution analysis.
+
+Steps may carry a `when` condition on the workflow input or another step's
+output, and may call a named sub-workflow (`workflow`) instead of a skill.
+Conditional and recursive compositions are evaluated lazily by default: only
+steps the outputs demand are run, unselected branches and unused optional
+steps never start, and repeated sub-workflow calls on the same input are
+memoized for the run.
 """
 
+import os
 import sys
 import json
+import time
+import asyncio
+import weakref
+import argparse
+import threading
+import contextlib
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from pathlib import Path
 
+from evaluation import (
+    EVALUATION_MODES,
+    LAZY_COMPOSITIONS,
+    Schedule,
+    WorkflowMemo,
+    compile_condition,
+    select_outputs,
+)
+from metrics_store import MetricsStore
+from payload import discard, is_buffer, json_default, pack, payload_size, read_buffer, unpack
+from remote_workers import LoopbackWorkerPool, RemoteWorkerPool
+from result_store import RETENTION_POLICIES, ResultStore, retain
+from skill_workers import SkillWorkerPool
+from step_cache import StepCache
+from streaming import CHUNK_MODES, StageError, StreamPipeline, read_chunks, write_chunk
+from tracing import PROFILE_MODES, TRACE_FORMATS, StepProbe, Tracer
+
+
+EXECUTORS = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
+# Where `worker_pool` runs skills: warm local processes, remote nodes, or loopback nodes
+WORKER_BACKENDS = {
+    "local": SkillWorkerPool,
+    "remote": RemoteWorkerPool,
+    "loopback": LoopbackWorkerPool,
+}
+
+# Sub-workflow nesting limit, and the composite settings sub-workflows inherit
+DEFAULT_MAX_DEPTH = 32
+INHERITED_SETTINGS = ("skills_dir", "workflows", "max_depth", "step_timeout")
+
+# Cap on concurrent skill invocations across async workflows. A semaphore
+# belongs to the event loop that first waits on it, so each loop gets its own
+_skill_limit = None
+_skill_semaphores = weakref.WeakKeyDictionary()
+_skill_semaphores_lock = threading.Lock()
+
+
+def limit_concurrent_skills(limit):
+    """Cap how many skills run at once across the async workflows of an event loop (None = unlimited)"""
+    global _skill_limit
+    with _skill_semaphores_lock:
+        _skill_limit = limit or None
+        _skill_semaphores.clear()
+
+
+def _skill_slot():
+    if not _skill_limit:
+        return contextlib.nullcontext()
+    loop = asyncio.get_running_loop()
+    with _skill_semaphores_lock:
+        semaphore = _skill_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = _skill_semaphores[loop] = asyncio.Semaphore(_skill_limit)
+        return semaphore
+
 
 class WorkflowOrchestrator:
-    def __init__(self, composition_config):
+    def __init__(self, composition_config, max_workers=None, executor=None, cache=None,
+                 tracer=None, profile_steps=None, profile_dir=".", worker_pool=None,
+                 retention=None, result_store=None, evaluation=None, metrics=None):
         self.config = composition_config
-        self.steps = composition_config['type_specific']['composite']['base_skills']
+        composite = composition_config['type_specific']['composite']
+        self.skills_dir = Path(composite.get('skills_dir', '.claude/skills'))
+        self.cache = cache or StepCache.from_config(composite.get('cache', {}))
+        self.tracer = tracer or Tracer()
+        self.profile_steps = profile_steps or {}
+        self.profile_dir = profile_dir
+        self.worker_pool = worker_pool
+        if worker_pool is None and composite.get('worker_pool'):
+            pool_config = composite['worker_pool']
+            backend = pool_config.get('backend', 'local')
+            if backend not in WORKER_BACKENDS:
+                raise ValueError(f"Unknown worker backend '{backend}' (expected one of: {', '.join(WORKER_BACKENDS)})")
+            self.worker_pool = WORKER_BACKENDS[backend].from_config(self.skills_dir, pool_config)
+        self.metrics = metrics
+        if metrics is None and composite.get('metrics'):
+            self.metrics = MetricsStore.from_config(composite['metrics'])
+        self._skill_versions = {}
+        self.composition_type = composite.get('composition_type', 'sequential')
+        self.steps = composite['base_skills']
+        self.max_workers = max_workers or composite.get('max_workers') or os.cpu_count() or 1
+        self.executor = executor or composite.get('executor', 'thread')
+        self.retention = retention or composite.get('retention', 'full')
+        if self.retention not in RETENTION_POLICIES:
+            raise ValueError(f"Unknown retention policy '{self.retention}' (expected one of: {', '.join(RETENTION_POLICIES)})")
+        self.result_store = result_store
+        if self.retention == 'spill' and result_store is None:
+            self.result_store = ResultStore(composite.get('spill_dir'))
+        self.timeout = composite.get('timeout')
+        self.step_timeout = composite.get('step_timeout')
+        if self.executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{self.executor}' (expected one of: {', '.join(EXECUTORS)})")
+        if self.worker_pool and self.executor == 'process':
+            raise ValueError("A worker pool already runs skills in processes; use the thread executor")
+        self.evaluation = evaluation or composite.get('evaluation') or (
+            'lazy' if self.composition_type in LAZY_COMPOSITIONS else 'eager')
+        if self.evaluation not in EVALUATION_MODES:
+            raise ValueError(f"Unknown evaluation '{self.evaluation}' (expected one of: {', '.join(EVALUATION_MODES)})")
+        self.workflows = composite.get('workflows', {})
+        self.max_depth = composite.get('max_depth', DEFAULT_MAX_DEPTH)
+        self.conditions = {
+            step['name']: compile_condition(step['when'], f"Step '{step['name']}'")
+            for step in self.steps if 'when' in step
+        }
+        self.dependencies = self._build_graph()
+        configured = composite.get('output')
+        # {"first": [...]}: the first listed step that ran (recursive case, then base case)
+        self.first_output = isinstance(configured, dict)
+        self.outputs = self._outputs(configured['first'] if self.first_output else configured)
+        self._memo = WorkflowMemo()
+        self._calls = ()
+
+    def close(self):
+        """Stop the worker pool and flush the metrics store, if any"""
+        if self.worker_pool:
+            self.worker_pool.close()
+        if self.metrics:
+            self.metrics.close()
+
+    def __getstate__(self):
+        # Worker processes only run _execute_skill; keep cache and tracer in the parent
+        state = self.__dict__.copy()
+        state['cache'] = None
+        state['tracer'] = None
+        state['metrics'] = None
+        state['_memo'] = None
+        state['conditions'] = None
+        return state
+
+    def _skill_version(self, skill_name):
+        """Version declared in the skill's skill.json (part of the cache key)"""
+        if skill_name not in self._skill_versions:
+            try:
+                with open(self.skills_dir / skill_name / 'skill.json', 'r') as f:
+                    version = json.load(f).get('version', 'unversioned')
+            except (OSError, ValueError):
+                version = 'unversioned'
+            self._skill_versions[skill_name] = version
+        return self._skill_versions[skill_name]
+
+    def _cache_key(self, step, data):
+        """Cache key for a step, or None when the step opted out of caching
+
+        Sub-workflow calls are memoized per run instead: they have no skill version.
+        """
+        if step.get('cache', True) is False or 'workflow' in step:
+            return None
+        return self.cache.key(step['name'], self._skill_version(step['name']), data)
+
+    def _build_graph(self):
+        """Resolve the upstream steps of every step and reject cycles"""
+        names = [step['name'] for step in self.steps]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate step names: {', '.join(duplicates)}")
+
+        dependencies = {}
+        for i, step in enumerate(self.steps):
+            if 'inputs' in step:
+                inputs = list(step['inputs'])
+            elif self.composition_type == 'sequential' and i > 0:
+                # Sequential compositions keep their implicit pipeline order
+                inputs = [self.steps[i - 1]['name']]
+            else:
+                inputs = []
+
+            guard = self.conditions[step['name']][0] if step['name'] in self.conditions else None
+            unknown = [name for name in inputs + [guard] if name and name not in names]
+            if unknown:
+                raise ValueError(f"Step '{step['name']}' depends on unknown steps: {', '.join(unknown)}")
+            if 'workflow' in step and step['workflow'] not in self.workflows:
+                raise ValueError(f"Step '{step['name']}' calls unknown workflow '{step['workflow']}'")
+            dependencies[step['name']] = inputs
+
+        # Kahn's algorithm: anything left unvisited sits on a cycle
+        # (a condition orders a step after the step it reads, like an input)
+        remaining = {name: set(inputs) for name, inputs in dependencies.items()}
+        for name, (guard, _) in self.conditions.items():
+            if guard:
+                remaining[name].add(guard)
+        ready = [name for name in names if not remaining[name]]
+        visited = 0
+        while ready:
+            done = ready.pop()
+            visited += 1
+            for name in names:
+                if done in remaining[name]:
+                    remaining[name].discard(done)
+                    if not remaining[name]:
+                        ready.append(name)
+        if visited != len(names):
+            cyclic = [name for name in names if remaining[name]]
+            raise ValueError(f"Dependency cycle between steps: {', '.join(cyclic)}")
+
+        return dependencies
+
+    def _outputs(self, configured):
+        """Steps whose outputs form the workflow result
+
+        Defaults to the sink steps (steps nothing else consumes); lazy
+        evaluation leaves out optional sinks, so they only run if asked for.
+        """
+        names = [step['name'] for step in self.steps]
+        if configured:
+            outputs = [configured] if isinstance(configured, str) else list(configured)
+            unknown = [name for name in outputs if name not in names]
+            if unknown:
+                raise ValueError(f"Unknown output steps: {', '.join(unknown)}")
+            return outputs
+
+        consumed = {name for inputs in self.dependencies.values() for name in inputs}
+        sinks = [step for step in self.steps if step['name'] not in consumed]
+        if self.evaluation == 'lazy':
+            required = [step['name'] for step in sinks if not step.get('optional', False)]
+            if required:
+                return required
+        return [step['name'] for step in sinks]
+
+    def _schedule(self):
+        order = [step['name'] for step in self.steps]
+        demand = self.outputs if self.evaluation == 'lazy' else order
+        return Schedule(order, self.dependencies, self.conditions, demand)
+
+    def _step_input(self, step_name, input_data, results):
+        """Build the input of a step from the workflow input or its upstream outputs"""
+        inputs = self.dependencies[step_name]
+        if not inputs:
+            return input_data
+        if len(inputs) == 1:
+            return results[inputs[0]]['output']
+        # Fan-in: a single value when only one input ran (the selected branch)
+        return select_outputs(inputs, results)
+
+    def _final_output(self, results):
+        """Output of the output steps that ran"""
+        return select_outputs(self.outputs, results, self.first_output)
+
+    def _reads(self, name):
+        """Steps whose outputs a step reads: its inputs and its condition's guard"""
+        guard = self.conditions.get(name, (None, None))[0]
+        return self.dependencies[name] + ([guard] if guard else [])
+
+    def _unread(self):
+        """Number of consumers (inputs and conditions) still to read each step's output
+
+        Under lazy evaluation only consumers the outputs can demand are counted.
+        """
+        consumers = set(self.dependencies)
+        if self.evaluation == 'lazy':
+            consumers, pending = set(), list(self.outputs)
+            while pending:
+                name = pending.pop()
+                if name not in consumers:
+                    consumers.add(name)
+                    pending.extend(self._reads(name))
+        unread = {name: 0 for name in self.dependencies}
+        for consumer in consumers:
+            for name in self._reads(consumer):
+                unread[name] += 1
+        return unread
+
+    def _consumed(self, name, unread, results, schedule):
+        """A consumer has read `name`, or will never read it (skipped or never demanded)"""
+        unread[name] -= 1
+        # Every consumer is done with it: apply the retention policy, except to
+        # the workflow outputs, which _final_output still needs in full
+        if unread[name] or name in self.outputs:
+            return
+        if name in results:
+            results[name] = retain(name, results[name], self.retention, self.result_store)
+        elif name not in schedule.state:
+            # Nothing is left to demand it, so it will never read its own inputs
+            for upstream in self._reads(name):
+                self._consumed(upstream, unread, results, schedule)
+
+    def _store(self, name, result, unread, results):
+        """Record a step result; retention applies at once if no consumer is left to read it"""
+        results[name] = result
+        if not unread[name] and name not in self.outputs:
+            results[name] = retain(name, result, self.retention, self.result_store)
+
+    def _launch_ready(self, schedule, unread, input_data, results, launch):
+        """Start every demanded step whose inputs are resolved; cache hits complete inline"""
+        positions = {step['name']: (i, step) for i, step in enumerate(self.steps, 1)}
+        read = lambda name: self._consumed(name, unread, results, schedule)
+        for name in schedule.advance(input_data, results, read):
+            i, step = positions[name]
+            print(f"\nStep {i}: {name} ({step['role']})")
+            data = self._step_input(name, input_data, results)
+            for upstream in self.dependencies[name]:
+                if upstream in results:
+                    read(upstream)
+            key = self._cache_key(step, data)
+            cached = key and self.cache.get(key, step.get('cache_ttl'), memory=self.retention == 'full')
+            if cached:
+                self._store(name, cached, unread, results)
+                self.tracer.record({"step": name, "cached": True, "status": "ok"})
+                print(f"  ✓ {name} completed (cached)")
+                schedule.resolve(name)
+            else:
+                launch(step, data, key)
+
+    def _profile_mode(self, step):
+        return self.profile_steps.get(step['name'], step.get('profile'))
+
+    def _invoke(self, step, data):
+        """Run a skill or sub-workflow under a StepProbe; returns (result, span)"""
+        with StepProbe(step['name'], self._profile_mode(step), self.profile_dir) as probe:
+            if 'workflow' in step:
+                result = self._run_workflow(step['workflow'], data)
+            else:
+                result = self._execute_skill(step['name'], data, step.get('timeout', self.step_timeout))
+            probe.finish(data, result)
+        return result, probe.span
+
+    def _invoke_packed(self, step, data):
+        """_invoke for process executors: payloads arrive and leave packed"""
+        result, span = self._invoke(step, unpack(data))
+        return dict(result, output=pack(result['output'])), span
+
+    def _completed(self, step, result, span, key, unread, results):
+        name = step['name']
+        self._store(name, result, unread, results)
+        self.tracer.record(span)
+        if key:
+            # Under metadata/spill retention the memory LRU would pin every full output
+            self.cache.put(key, result, memory=self.retention == 'full')
+        if self.metrics and 'workflow' not in step:
+            tokens = result.get('metadata', {}).get('tokens_used', 0)
+            self.metrics.record(name, True, span['wall_ms'] / 1000, tokens)
+        print(f"  ✓ {name} completed ({span['wall_ms']:.1f} ms)")
+
+    def _step_failed(self, step, error, results):
+        """Record a failed step; returns the workflow error unless the step is optional"""
+        name = step['name']
+        span = getattr(error, 'trace_span', None)
+        if span:
+            self.tracer.record(span)
+        if self.metrics and 'workflow' not in step:
+            self.metrics.record(name, False, span['wall_ms'] / 1000 if span else 0.0, error=error)
+        if step.get('optional', False):
+            print(f"  ⚠ {name} failed (optional, continuing): {error}")
+            results[name] = {
+                "output": None,
+                "error": str(error),
+                "metadata": {"skill": name, "optional": True}
+            }
+            return None
+
+        print(f"  ✗ {name} failed: {error}")
+        return {
+            "status": "error",
+            "failed_step": name,
+            "error": str(error),
+            "partial_results": results
+        }
+
+    def _success(self, results):
+        return {
+            "status": "success",
+            "final_output": self._final_output(results),
+            "all_results": results,
+            "steps_completed": len(results),
+            "steps_skipped": [step['name'] for step in self.steps if step['name'] not in results],
+            "workflow_memo": self._memo.stats() if self.workflows else None,
+            "cache": self.cache.stats(),
+            "timings": self.tracer.summary(),
+            "workers": self.worker_pool.stats() if self.worker_pool else None,
+            "metrics": self.metrics.stats() if self.metrics else None
+        }
 
     def execute(self, input_data):
         """Execute the complete workflow"""
         results = {}
-        current_data = input_data
+        schedule = self._schedule()
+        unread = self._unread()
+        running = {}
 
-        print(f"Starting workflow with {len(self.steps)} steps...")
+        print(f"Starting workflow with {len(self.steps)} steps "
+              f"({self.executor} pool, {self.max_workers} workers, {self.evaluation})...")
 
-        for i, step in enumerate(self.steps, 1):
-            print(f"\nStep {i}: {step['name']} ({step['role']})")
+        pool = EXECUTORS[self.executor](max_workers=self.max_workers)
+        # Sub-workflows run in this process; they start their own pools
+        calls = pool
+        if self.executor == 'process' and any('workflow' in step for step in self.steps):
+            calls = ThreadPoolExecutor(max_workers=self.max_workers)
 
-            try:
-                # Execute skill (simulated - replace with actual skill execution)
-                result = self._execute_skill(step['name'], current_data)
-                results[step['name']] = result
-                current_data = result['output']
-
-                print(f"  ✓ Completed")
-
-            except Exception as e:
-                print(f"  ✗ Failed: {e}")
-                return {
-                    "status": "error",
-                    "failed_step": step['name'],
-                    "error": str(e),
-                    "partial_results": results
-                }
+        def launch(step, data, key):
+            if self.executor == 'process' and 'workflow' not in step:
+                packed = pack(data)
+                running[pool.submit(self._invoke_packed, step, packed)] = (step, key, packed)
+            else:
+                running[calls.submit(self._invoke, step, data)] = (step, key, None)
+
+        try:
+            while True:
+                self._launch_ready(schedule, unread, input_data, results, launch)
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step, key, packed = running.pop(future)
+                    discard(packed)
+                    try:
+                        result, span = future.result()
+                        if self.executor == 'process' and 'workflow' not in step:
+                            result['output'] = unpack(result['output'], claim=True)
+                    except Exception as e:
+                        failure = self._step_failed(step, e, results)
+                        if failure:
+                            return failure
+                    else:
+                        self._completed(step, result, span, key, unread, results)
+                    schedule.resolve(step['name'])
+        finally:
+            # Drop queued steps after a failure instead of waiting for them
+            pool.shutdown(wait=False, cancel_futures=True)
+            if calls is not pool:
+                calls.shutdown(wait=False, cancel_futures=True)
+            for _, _, packed in running.values():
+                discard(packed)
+
+        return self._success(results)
+
+    async def execute_async(self, input_data, timeout=None):
+        """Execute the workflow on the running event loop
+
+        Each step may set `timeout` (seconds, default `step_timeout`); the
+        whole workflow is bounded by `timeout` (argument or composite config).
+        A failing required step cancels every step still in flight.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        results = {}
+        # Blocking calls run on this run's own executor, released without
+        # waiting: a step abandoned at its deadline must not block
+        # asyncio.run's shutdown of the default executor
+        blocking = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4),
+                                      thread_name_prefix="mas-step")
+
+        print(f"Starting async workflow with {len(self.steps)} steps...")
+
+        try:
+            return await asyncio.wait_for(self._run_async(input_data, results, blocking), timeout)
+        except asyncio.TimeoutError:
+            print(f"  ✗ Workflow timed out after {timeout}s")
+            return {
+                "status": "error",
+                "failed_step": None,
+                "error": f"E004: Execution timeout (workflow exceeded {timeout}s)",
+                "partial_results": results
+            }
+        finally:
+            blocking.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_async(self, input_data, results, blocking):
+        schedule = self._schedule()
+        unread = self._unread()
+        running = {}
+
+        def launch(step, data, key):
+            running[asyncio.ensure_future(self._run_step_async(step, data, blocking))] = (step, key)
+
+        try:
+            while True:
+                self._launch_ready(schedule, unread, input_data, results, launch)
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step, key = running.pop(task)
+                    try:
+                        result, span = task.result()
+                    except Exception as e:
+                        failure = self._step_failed(step, e, results)
+                        if failure:
+                            return failure
+                    else:
+                        self._completed(step, result, span, key, unread, results)
+                    schedule.resolve(step['name'])
+        finally:
+            # Cancel in-flight steps after a failure or workflow timeout
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+        return self._success(results)
+
+    async def _run_step_async(self, step, data, blocking=None):
+        """Run one step under the global skill limit and its own deadline"""
+        timeout = step.get('timeout', self.step_timeout)
+        async with _skill_slot():
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            # Steps interleave on the loop thread, so only wall time is meaningful here
+            with StepProbe(step['name'], self._profile_mode(step), self.profile_dir, cpu_clock=None) as probe:
+                if 'workflow' in step:
+                    call = asyncio.get_running_loop().run_in_executor(
+                        blocking, self._run_workflow, step['workflow'], data)
+                else:
+                    call = self._execute_skill_async(step['name'], data, blocking, deadline)
+                try:
+                    result = await asyncio.wait_for(call, timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"E004: Execution timeout (step exceeded {timeout}s)") from None
+                probe.finish(data, result)
+            return result, probe.span
+
+    async def _execute_skill_async(self, skill_name, data, executor=None, deadline=None):
+        """Async skill execution (override with a natively async, cancellable call)
+
+        The default runs `_execute_skill` on `executor` and hands the worker
+        pool the time left until `deadline` (time.monotonic()), so the pool
+        stops a skill that overruns it. Without a pool the thread cannot be
+        interrupted, only abandoned.
+        """
+        def call():
+            remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            return self._execute_skill(skill_name, data, remaining)
 
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+    def _stream_order(self):
+        """Steps of a linear pipeline in execution order (streaming needs one path)"""
+        if self.conditions or self.workflows:
+            raise ValueError("Streaming mode does not support conditions or sub-workflows")
+        consumers = {}
+        for name, inputs in self.dependencies.items():
+            if len(inputs) > 1:
+                raise ValueError(f"Streaming mode cannot fan in at step '{name}'")
+            for upstream in inputs:
+                consumers.setdefault(upstream, []).append(name)
+
+        fan_out = [name for name, names in consumers.items() if len(names) > 1]
+        if fan_out:
+            raise ValueError(f"Streaming mode cannot fan out at step '{fan_out[0]}'")
+        heads = [step['name'] for step in self.steps if not self.dependencies[step['name']]]
+        if len(heads) != 1:
+            raise ValueError("Streaming mode needs exactly one entry step")
+
+        order = heads
+        while order[-1] in consumers:
+            order.append(consumers[order[-1]][0])
+        return order
+
+    def execute_stream(self, chunks, queue_size=8):
+        """Stream chunks through the pipeline, yielding final outputs as they are produced"""
+        order = self._stream_order()
+        print(f"Streaming through {len(order)} steps...", file=sys.stderr)
+
+        def stage(name):
+            return lambda inbound: self._stream_skill(name, inbound)
+
+        pipeline = StreamPipeline([(name, stage(name)) for name in order], queue_size)
+        yield from pipeline.run(chunks)
+
+    def _stream_skill(self, skill_name, chunks):
+        """Stream chunks through a single skill (override for stateful or batching skills)"""
+        for chunk in chunks:
+            yield self._execute_skill(skill_name, chunk)['output']
+
+    def _run_workflow(self, name, data):
+        """Run sub-workflow `name`; repeated calls on the same input within a run are memoized"""
+        key = WorkflowMemo.key(name, data)
+        if key in self._calls:
+            raise RecursionError(f"Workflow '{name}' calls itself with the same input")
+        if len(self._calls) >= self.max_depth:
+            raise RecursionError(f"Workflows nested deeper than max_depth ({self.max_depth})")
+
+        result, memoized = self._memo.run(key, lambda: self._sub_workflow(name, key).execute(data))
+        if result['status'] != 'success':
+            raise RuntimeError(f"Workflow '{name}' failed at step '{result['failed_step']}': {result['error']}")
         return {
-            "status": "success",
-            "final_output": current_data,
-            "all_results": results,
-            "steps_completed": len(self.steps)
+            "output": result['final_output'],
+            "metadata": {
+                "workflow": name,
+                "steps_completed": result['steps_completed'],
+                "memoized": memoized,
+                "input_size": payload_size(data)
+            }
         }
 
-    def _execute_skill(self, skill_name, data):
-        """Execute a single skill (placeholder - implement actual execution)"""
-        # This would call the actual skill
-        # For now, simulate with a simple transformation
+    def _sub_workflow(self, name, key):
+        """Orchestrator for one sub-workflow call, sharing this run's cache, tracer, workers and memo"""
+        composite = self.config['type_specific']['composite']
+        settings = {setting: composite[setting] for setting in INHERITED_SETTINGS if setting in composite}
+        settings.update(self.workflows[name])
+        child = WorkflowOrchestrator(
+            {"type_specific": {"composite": settings}},
+            max_workers=self.max_workers,
+            executor=self.executor,
+            cache=self.cache,
+            tracer=self.tracer,
+            profile_steps=self.profile_steps,
+            profile_dir=self.profile_dir,
+            worker_pool=self.worker_pool,
+            retention=self.retention,
+            result_store=self.result_store,
+            metrics=self.metrics,
+        )
+        child._memo = self._memo
+        child._calls = self._calls + (key,)
+        return child
+
+    def _execute_skill(self, skill_name, data, timeout=None):
+        """Execute a single skill (simulated unless a worker pool is configured)"""
+        if self.worker_pool:
+            return {
+                "output": self.worker_pool.run(skill_name, data, timeout=timeout),
+                "metadata": {
+                    "skill": skill_name,
+                    "input_size": payload_size(data)
+                }
+            }
+
+        # No worker pool: simulate with a simple transformation
+        # (buffers pass through by reference, without a copy)
         return {
-            "output": f"Processed by {skill_name}: {data}",
+            "output": data if is_buffer(data) else f"Processed by {skill_name}: {data}",
             "metadata": {
                 "skill": skill_name,
-                "input_size": len(str(data))
+                "input_size": payload_size(data)
             }
         }
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python orchestrator.py <composition.json>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Run a composite skill workflow")
+    parser.add_argument("config", help="Composition JSON (skill.json of the composite skill)")
+    parser.add_argument("--cache-dir", help="Persist step results in this directory")
+    parser.add_argument("--stream", choices=CHUNK_MODES,
+                        help="Stream stdin through the steps in chunks and write results as they arrive")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024,
+                        help="Block size for --stream bytes (default: 64 KiB)")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="Chunks buffered between streaming steps (default: 8)")
+    parser.add_argument("--timeout", type=float,
+                        help="Run on asyncio and fail the workflow after this many seconds")
+    parser.add_argument("--trace", help="Write per-step spans to this file")
+    parser.add_argument("--trace-format", choices=TRACE_FORMATS, default="jsonl",
+                        help="jsonl (one span per line) or chrome (trace-event JSON)")
+    parser.add_argument("--profile", action="append", default=[], metavar="STEP[=MODE]",
+                        help=f"Profile a step; MODE is one of {', '.join(PROFILE_MODES)} (default: cprofile)")
+    parser.add_argument("--profile-dir", default=".", help="Where cProfile .prof files are written")
+    parser.add_argument("--workers", type=int,
+                        help="Run the real skills in this many warm worker processes")
+    parser.add_argument("--max-tasks-per-worker", type=int, default=1000,
+                        help="Recycle a worker after this many invocations (default: 1000)")
+    parser.add_argument("--remote-workers", metavar="HOST:PORT[,HOST:PORT...]",
+                        help="Run the skills on these worker nodes (remote_workers.py serve)")
+    parser.add_argument("--retention", choices=RETENTION_POLICIES,
+                        help="Keep intermediate results in full, as metadata/digests only, or spilled to disk")
+    parser.add_argument("--spill-dir", help="Directory for --retention spill (default: a temp dir)")
+    parser.add_argument("--metrics-dir",
+                        help="Append per-skill invocation metrics to this directory (see metrics_store.py)")
+    parser.add_argument("--evaluation", choices=EVALUATION_MODES,
+                        help="lazy: run only the steps the outputs need (default for conditional/recursive)")
+    parser.add_argument("--binary", action="store_true",
+                        help="Pass stdin to the first steps as a bytes buffer (files are memory-mapped)")
+    args = parser.parse_args()
 
-    config_file = sys.argv[1]
-
-    with open(config_file, 'r') as f:
+    with open(args.config, 'r') as f:
         config = json.load(f)
 
+    composite = config['type_specific']['composite']
+    cache_config = dict(composite.get('cache', {}))
+    if args.cache_dir:
+        cache_config['directory'] = args.cache_dir
+
+    profile_steps = {}
+    for spec in args.profile:
+        step_name, _, mode = spec.partition("=")
+        profile_steps[step_name] = mode or "cprofile"
+
+    tracer = Tracer(args.trace, args.trace_format)
+    worker_pool = None
+    if args.workers and args.remote_workers:
+        parser.error("--workers and --remote-workers are mutually exclusive")
+    if args.remote_workers:
+        worker_pool = RemoteWorkerPool(args.remote_workers.split(","))
+    elif args.workers:
+        skills_dir = composite.get('skills_dir', '.claude/skills')
+        worker_pool = SkillWorkerPool(skills_dir, args.workers, args.max_tasks_per_worker)
+    orchestrator = WorkflowOrchestrator(
+        config,
+        cache=StepCache.from_config(cache_config),
+        tracer=tracer,
+        profile_steps=profile_steps,
+        profile_dir=args.profile_dir,
+        worker_pool=worker_pool,
+        retention=args.retention,
+        result_store=ResultStore(args.spill_dir) if args.spill_dir else None,
+        evaluation=args.evaluation,
+        metrics=MetricsStore(args.metrics_dir) if args.metrics_dir else None,
+    )
+
+    if args.stream:
+        chunks = read_chunks(sys.stdin, args.stream, args.chunk_size)
+        try:
+            for output in orchestrator.execute_stream(chunks, args.queue_size):
+                write_chunk(sys.stdout, output, args.stream)
+        except StageError as e:
+            print(f"✗ Step {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            orchestrator.close()
+        return
+
     # Get input
-    input_data = sys.stdin.read() if not sys.stdin.isatty() else "Sample input data"
+    if sys.stdin.isatty():
+        input_data = "Sample input data"
+    elif args.binary:
+        input_data = read_buffer(sys.stdin)
+    else:
+        input_data = sys.stdin.read()
 
     # Execute workflow
-    orchestrator = WorkflowOrchestrator(config)
-    result = orchestrator.execute(input_data)
+    try:
+        if args.timeout is not None or orchestrator.timeout or orchestrator.step_timeout:
+            result = asyncio.run(orchestrator.execute_async(input_data, args.timeout))
+        else:
+            result = orchestrator.execute(input_data)
+    finally:
+        tracer.close()
+        orchestrator.close()
 
     # Output result
     print("\n" + "="*50)
     print("WORKFLOW RESULT")
     print("="*50)
-    print(json.dumps(result, indent=2))
+    # json.dump encodes incrementally instead of building one large string
+    json.dump(result, sys.stdout, indent=2, default=json_default)
+    print()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Step Payloads
+Zero-copy handling of the data passed between composite workflow steps
+
+Steps may exchange bytes-like buffers (bytes, bytearray, memoryview). Within
+one process they are passed by reference. When a large buffer has to cross
+into another process it is written once to a memory-mapped temp file (on
+tmpfs where available) and only a small handle is pickled; the receiver maps
+the file read-only instead of unpickling a copy.
+"""
+
+import io
+import os
+import mmap
+import json
+import stat
+import base64
+import tempfile
+
+
+# Below this size pickling through the pipe is cheaper than a file round trip
+SHARE_THRESHOLD = 64 * 1024
+SHARE_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def is_buffer(data):
+    return isinstance(data, (bytes, bytearray, memoryview))
+
+
+def payload_size(data):
+    """Size of a step payload in bytes, taken from buffer lengths where possible
+
+    Containers are walked and their keys and values summed, so buffers held
+    in a dict or list are measured by length instead of being encoded; only
+    other scalars are sized by their JSON text.
+    """
+    if data is None:
+        return 0
+    if isinstance(data, memoryview):
+        return data.nbytes
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, str):
+        # ASCII strings are one byte per character; skip the encode copy
+        return len(data) if data.isascii() else len(data.encode("utf-8"))
+    if isinstance(data, dict):
+        return sum(payload_size(key) + payload_size(value) for key, value in data.items())
+    if isinstance(data, (list, tuple)):
+        return sum(payload_size(value) for value in data)
+    return len(json.dumps(data, default=json_default).encode("utf-8"))
+
+
+class SharedPayload:
+    """Picklable handle to a buffer parked in a memory-mapped temp file"""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    @classmethod
+    def create(cls, data):
+        fd, path = tempfile.mkstemp(prefix="mas-payload-", dir=SHARE_DIR)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return cls(path, payload_size(data))
+
+    def open(self):
+        """Map the payload read-only; the view stays valid after discard()"""
+        if self.size == 0:
+            return memoryview(b"")
+        with open(self.path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapping)
+
+    def discard(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def pack(data):
+    """Prepare a payload for another process: large buffers become a SharedPayload"""
+    if is_buffer(data):
+        if payload_size(data) >= SHARE_THRESHOLD:
+            return SharedPayload.create(data)
+        # memoryviews cannot be pickled; small ones are cheap to copy
+        return bytes(data) if isinstance(data, memoryview) else data
+    if isinstance(data, dict):
+        return {key: pack(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [pack(value) for value in data]
+    return data
+
+
+def unpack(data, claim=False):
+    """Inverse of pack(); `claim` removes the backing files once they are mapped"""
+    if isinstance(data, SharedPayload):
+        view = data.open()
+        if claim:
+            data.discard()
+        return view
+    if isinstance(data, dict):
+        return {key: unpack(value, claim) for key, value in data.items()}
+    if isinstance(data, list):
+        return [unpack(value, claim) for value in data]
+    return data
+
+
+def discard(data):
+    """Remove the backing files of a packed payload, if it has any"""
+    if isinstance(data, SharedPayload):
+        data.discard()
+    elif isinstance(data, dict):
+        for value in data.values():
+            discard(value)
+    elif isinstance(data, list):
+        for value in data:
+            discard(value)
+
+
+def read_buffer(stream):
+    """Read a binary stream as a buffer, mapping regular files instead of copying them"""
+    raw = getattr(stream, "buffer", stream)
+    try:
+        fd = raw.fileno()
+        info = os.fstat(fd)
+        if stat.S_ISREG(info.st_mode) and info.st_size:
+            return memoryview(mmap.mmap(fd, 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError, io.UnsupportedOperation):
+        pass
+    return memoryview(raw.read())
+
+
+def json_default(value):
+    """json.dumps hook: buffers become text, or base64 when they are not UTF-8"""
+    if is_buffer(value):
+        raw = bytes(value)
+        try:
+            return raw.decode("utf-8")
+        except UnicodeDecodeError:
+            return {"encoding": "base64", "data": base64.b64encode(raw).decode("ascii")}
+    return str(value)
@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+Remote Skill Workers
+Runs composite workflow steps on worker nodes over TCP
+
+Each node runs `python remote_workers.py serve`, a WorkerServer in front of
+a local SkillWorkerPool (warm worker processes). A RemoteWorkerPool connects
+to any number of nodes. It is a drop-in replacement for SkillWorkerPool in
+WorkflowOrchestrator (composite `worker_pool.backend: "remote"`, or
+--remote-workers).
+
+Protocol: length-prefixed frames. Each frame is a JSON header plus a raw
+body, preceded by struct "!II" (header length, body length). Buffers travel
+as raw bytes and everything else as JSON, so nothing is unpickled from the
+network. Bodies larger than CHUNK_SIZE are split into "part" frames, so
+heartbeats and other results interleave with them. Frame headers, frame
+bodies and reassembled messages are size-capped before anything is
+allocated, so a peer cannot make the reader buffer unbounded data. Each
+result streams back as soon as its step finishes, in any order. Nodes accept
+only connections that present the shared token from MAS_WORKER_TOKEN, when
+it is set; until the hello frame is accepted nothing else is read from the
+connection.
+
+Scheduling: a step goes to the connected node using the smallest share of
+its capacity. Ties go to nodes that already loaded the skill, then to the
+lower reported system load. A node that disconnects or misses heartbeats is
+dropped, and its in-flight steps are re-queued on other nodes (up to
+max_retries times). The pool keeps trying to reconnect to dropped nodes.
+
+LoopbackWorkerPool speaks the same protocol to worker servers running on
+127.0.0.1 threads inside this process, for testing without a cluster.
+"""
+
+import os
+import re
+import hmac
+import json
+import time
+import socket
+import struct
+import argparse
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from payload import is_buffer, json_default
+from skill_workers import SkillError, SkillWorkerPool, WorkerCrashed, load_skill
+
+
+FRAME = struct.Struct("!II")
+CHUNK_SIZE = 1024 * 1024
+# Frame limits: headers are small JSON, bodies never exceed one chunk, and a
+# message reassembled from parts (or all parts buffered on a connection) is
+# capped at MAX_MESSAGE
+MAX_HEADER = 64 * 1024
+MAX_BODY = CHUNK_SIZE
+MAX_MESSAGE = 512 * 1024 * 1024
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 10.0
+RECONNECT_INTERVAL = 5.0
+DEFAULT_PORT = 7070
+TOKEN_ENV = "MAS_WORKER_TOKEN"
+# Skill names index directories on the node: never let a path through
+SKILL_NAME = re.compile(r"^[a-z0-9-]+$")
+
+
+def encode_payload(data):
+    """(kind, body) for a step payload: buffers as-is, anything else as JSON"""
+    if is_buffer(data):
+        return "bytes", data
+    return "json", json.dumps(data, default=json_default).encode("utf-8")
+
+
+def decode_payload(kind, body):
+    """Inverse of encode_payload(); buffers arrive as a bytearray"""
+    if kind == "bytes":
+        return body
+    return json.loads(body)
+
+
+def parse_address(address, default_port=DEFAULT_PORT):
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, default_port
+    return host.strip("[]"), int(port)
+
+
+class Connection:
+    """Framed messages over a socket; send() is thread-safe, recv() is for one reader"""
+
+    def __init__(self, sock, max_message=MAX_MESSAGE):
+        self.sock = sock
+        self.max_message = max_message
+        self._send_lock = threading.Lock()
+        self._parts = {}
+        self._buffered = 0
+
+    def send(self, header, body=b""):
+        body = memoryview(body).cast("B")
+        start = 0
+        while len(body) - start > CHUNK_SIZE:
+            self._send_frame({"type": "part", "id": header["id"]}, body[start:start + CHUNK_SIZE])
+            start += CHUNK_SIZE
+        self._send_frame(header, body[start:])
+
+    def _send_frame(self, header, body):
+        encoded = json.dumps(header).encode("utf-8")
+        with self._send_lock:
+            self.sock.sendall(FRAME.pack(len(encoded), len(body)) + encoded)
+            if body:
+                self.sock.sendall(body)
+
+    def recv(self, expect=None):
+        """Next complete (header, body), reassembling parts; None once the peer has closed
+
+        With `expect`, any other frame type (parts included) is a protocol
+        error, raised before its body is read. Oversized frames and messages
+        raise ValueError before anything is allocated for them.
+        """
+        while True:
+            prefix = self._read(FRAME.size)
+            if prefix is None:
+                return None
+            header_size, body_size = FRAME.unpack(prefix)
+            if header_size > MAX_HEADER:
+                raise ValueError(f"Frame header of {header_size} bytes exceeds {MAX_HEADER}")
+            if body_size > MAX_BODY:
+                raise ValueError(f"Frame body of {body_size} bytes exceeds {MAX_BODY}")
+            header = json.loads(self._read(header_size, required=True))
+            if not isinstance(header, dict):
+                raise ValueError("Frame header must be a JSON object")
+            kind = header.get("type")
+            if expect is not None and kind != expect:
+                raise ValueError(f"Expected a '{expect}' frame, got '{kind}'")
+            if self._buffered + body_size > self.max_message:
+                raise ValueError(f"Buffered message data exceeds {self.max_message} bytes")
+            body = self._read(body_size, required=True) if body_size else bytearray()
+            if kind == "part":
+                self._parts.setdefault(header.get("id"), bytearray()).extend(body)
+                self._buffered += body_size
+                continue
+            parts = self._parts.pop(header.get("id"), None)
+            if parts is not None:
+                self._buffered -= len(parts)
+                parts.extend(body)
+                body = parts
+            return header, body
+
+    def _read(self, size, required=False):
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            count = self.sock.recv_into(view[received:])
+            if not count:
+                if received or required:
+                    raise ConnectionError("Connection closed in the middle of a frame")
+                return None
+            received += count
+        return buffer
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def _system_load():
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (OSError, AttributeError):
+        return 0.0
+
+
+# ---------- Node side ----------
+
+class WorkerServer:
+    """Accepts coordinators and runs their steps with `runner(skill_name, data)`"""
+
+    def __init__(self, runner, host="127.0.0.1", port=0, capacity=4, token=None,
+                 heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.runner = runner
+        self.capacity = capacity
+        self.token = token
+        self.heartbeat_interval = heartbeat_interval
+        self.node = socket.gethostname()
+        self.running = 0
+        self._listener = socket.create_server((host, port))
+        # accept() is not woken by close() on every platform; poll instead
+        self._listener.settimeout(0.5)
+        host, port = self._listener.getsockname()[:2]
+        self.address = f"{host}:{port}"
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """Serve in a background thread; returns self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        while not self._closed:
+            try:
+                sock, _ = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(Connection(sock),), daemon=True).start()
+
+    def close(self):
+        """Stop accepting and drop every coordinator connection"""
+        with self._lock:
+            self._closed = True
+            clients, self._clients = self._clients, set()
+        self._listener.close()
+        for conn in clients:
+            conn.close()
+
+    def _serve(self, conn):
+        with self._lock:
+            if self._closed:
+                conn.close()
+                return
+            self._clients.add(conn)
+        stop = threading.Event()
+        try:
+            # Nothing but the hello frame is read before the token is checked
+            hello = conn.recv(expect="hello")
+            if hello is None:
+                return
+            if self.token and not hmac.compare_digest(str(hello[0].get("token") or ""), self.token):
+                return
+            conn.send({"type": "ready", "capacity": self.capacity, "node": self.node})
+            threading.Thread(target=self._heartbeat, args=(conn, stop), daemon=True).start()
+
+            with ThreadPoolExecutor(max_workers=self.capacity) as pool:
+                while True:
+                    message = conn.recv()
+                    if message is None:
+                        break
+                    header, body = message
+                    if header.get("type") == "run":
+                        pool.submit(self._run, conn, header, body)
+        except (OSError, ValueError):
+            pass
+        finally:
+            stop.set()
+            with self._lock:
+                self._clients.discard(conn)
+            conn.close()
+
+    def _run(self, conn, header, body):
+        skill_name = header.get("skill", "")
+        with self._lock:
+            self.running += 1
+        try:
+            if not SKILL_NAME.match(skill_name):
+                raise ValueError(f"Invalid skill name '{skill_name}'")
+            kind, output = encode_payload(self.runner(skill_name, decode_payload(header["payload"], body)))
+            reply = {"type": "result", "id": header["id"], "status": "ok", "payload": kind}
+        except SkillError as e:
+            reply, output = {"type": "result", "id": header["id"], "status": "error", "error": str(e)}, b""
+        except Exception as e:
+            error = f"{skill_name}: {type(e).__name__}: {e}"
+            reply, output = {"type": "result", "id": header["id"], "status": "error", "error": error}, b""
+        finally:
+            with self._lock:
+                self.running -= 1
+        try:
+            conn.send(reply, output)
+        except OSError:
+            pass   # The coordinator is gone and re-queues the step elsewhere
+
+    def _heartbeat(self, conn, stop):
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                conn.send({"type": "heartbeat", "running": self.running, "load": _system_load()})
+            except OSError:
+                return
+
+
+class InProcessRunner:
+    """Runs skills' process_input in the calling thread (loopback testing)"""
+
+    def __init__(self, skills_dir):
+        self.skills_dir = skills_dir
+        self._handlers = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, skill_name, data):
+        handler = self._handlers.get(skill_name)
+        if handler is None:
+            with self._lock:
+                if skill_name not in self._handlers:
+                    self._handlers[skill_name] = load_skill(self.skills_dir, skill_name)
+                handler = self._handlers[skill_name]
+        return handler(data)
+
+
+# ---------- Coordinator side ----------
+
+class _Task:
+    __slots__ = ("id", "skill", "kind", "body", "future", "attempts")
+
+    def __init__(self, task_id, skill, kind, body):
+        self.id = task_id
+        self.skill = skill
+        self.kind = kind
+        self.body = body
+        self.future = Future()
+        self.attempts = 0
+
+
+class _Node:
+    def __init__(self, address):
+        self.address = address
+        self.host, self.port = parse_address(address)
+        self.conn = None
+        self.capacity = 0
+        self.inflight = {}
+        self.loaded = set()
+        self.load = 0.0
+        self.tasks = 0
+        self.last_seen = 0.0
+        self.last_attempt = 0.0
+
+
+class RemoteWorkerPool:
+    """Runs skills on remote WorkerServers; same interface as SkillWorkerPool"""
+
+    def __init__(self, addresses, max_retries=2, token=None, connect_timeout=5.0,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT, reconnect_interval=RECONNECT_INTERVAL):
+        if not addresses:
+            raise ValueError("RemoteWorkerPool needs at least one worker address")
+        self.nodes = [_Node(address) for address in addresses]
+        self.max_retries = max_retries
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV)
+        self.connect_timeout = connect_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.reconnect_interval = reconnect_interval
+        self.counters = {"tasks": 0, "retried": 0, "lost": 0, "failed": 0}
+        self._pending = deque()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._stranded_since = None
+
+        for node in self.nodes:
+            self._connect(node)
+        if not any(node.conn for node in self.nodes):
+            raise ConnectionError(f"No remote workers reachable ({', '.join(addresses)})")
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    @classmethod
+    def from_config(cls, skills_dir, config):
+        """Build a pool from the composite `worker_pool` settings (skills live on the nodes)"""
+        return cls(config["workers"], max_retries=config.get("max_retries", 2))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, skill_name, data, timeout=None):
+        """Run `process_input` of a skill on the least-loaded node and return its result"""
+        if self._closed.is_set():
+            raise RuntimeError("Worker pool is closed")
+        task = _Task(next(self._ids), skill_name, *encode_payload(data))
+        with self._lock:
+            self._pending.append(task)
+            self.counters["tasks"] += 1
+        self._schedule()
+
+        try:
+            status, kind, payload = task.future.result(timeout)
+        except FutureTimeout:
+            self._abandon(task)
+            raise TimeoutError(f"E004: Execution timeout ({skill_name} exceeded {timeout}s)") from None
+        if status == "error":
+            raise SkillError(payload)
+        return decode_payload(kind, payload)
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                workers=sum(1 for node in self.nodes if node.conn),
+                pending=len(self._pending),
+                nodes={
+                    node.address: {
+                        "connected": node.conn is not None,
+                        "capacity": node.capacity,
+                        "inflight": len(node.inflight),
+                        "tasks": node.tasks,
+                        "load": round(node.load, 2),
+                    }
+                    for node in self.nodes
+                },
+            )
+
+    def close(self):
+        """Disconnect from every node; steps still waiting fail"""
+        self._closed.set()
+        with self._lock:
+            connections = [node.conn for node in self.nodes if node.conn]
+        for conn in connections:
+            conn.close()
+        self._fail_pending(RuntimeError("Worker pool is closed"))
+
+    def _connect(self, node):
+        node.last_attempt = time.monotonic()
+        try:
+            sock = socket.create_connection((node.host, node.port), timeout=self.connect_timeout)
+        except OSError:
+            return False
+        conn = Connection(sock)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn.send({"type": "hello", "token": self.token})
+            reply = conn.recv(expect="ready")
+            if reply is None:
+                raise ConnectionError(f"{node.address} refused the connection")
+            sock.settimeout(None)
+        except (OSError, ValueError):
+            conn.close()
+            return False
+
+        with self._lock:
+            node.conn = conn
+            node.capacity = max(1, int(reply[0].get("capacity", 1)))
+            node.last_seen = time.monotonic()
+        threading.Thread(target=self._read, args=(node, conn), daemon=True).start()
+        self._schedule()
+        return True
+
+    def _read(self, node, conn):
+        """Receive results and heartbeats from one node until it goes away"""
+        try:
+            while True:
+                message = conn.recv()
+                if message is None:
+                    break
+                header, body = message
+                node.last_seen = time.monotonic()
+                if header.get("type") == "heartbeat":
+                    node.load = header.get("load", 0.0)
+                elif header.get("type") == "result":
+                    self._finish(node, header, body)
+        except (OSError, ValueError):
+            pass
+        self._lost(node, conn)
+
+    def _finish(self, node, header, body):
+        with self._lock:
+            task = node.inflight.pop(header["id"], None)
+            if task:
+                node.loaded.add(task.skill)
+                node.tasks += 1
+                if header["status"] != "ok":
+                    self.counters["failed"] += 1
+        if task:
+            task.body = None
+            outcome = (header["payload"], body) if header["status"] == "ok" else (None, header.get("error"))
+            self._resolve(task, result=(header["status"],) + outcome)
+        self._schedule()
+
+    def _lost(self, node, conn):
+        """Drop a node's connection and re-queue the steps it was running"""
+        failed = []
+        with self._lock:
+            if node.conn is not conn:
+                return
+            node.conn = None
+            tasks = list(node.inflight.values())
+            node.inflight.clear()
+            if self._closed.is_set():
+                failed = tasks
+            else:
+                self.counters["lost"] += 1
+                for task in reversed(tasks):
+                    if task.attempts > self.max_retries:
+                        failed.append(task)
+                    else:
+                        self.counters["retried"] += 1
+                        self._pending.appendleft(task)
+        conn.close()
+        for task in failed:
+            self._resolve(task, error=WorkerCrashed(
+                f"Worker {node.address} running {task.skill} was lost (after {task.attempts} attempts)"
+            ))
+        self._schedule()
+
+    def _pick(self, skill_name):
+        free = [node for node in self.nodes if node.conn and len(node.inflight) < node.capacity]
+        if not free:
+            return None
+        return min(free, key=lambda node: (
+            len(node.inflight) / node.capacity, skill_name not in node.loaded, node.load
+        ))
+
+    def _schedule(self):
+        """Assign waiting steps to nodes with free capacity; sends happen outside the lock"""
+        sends = []
+        with self._lock:
+            while self._pending:
+                node = self._pick(self._pending[0].skill)
+                if node is None:
+                    break
+                task = self._pending.popleft()
+                task.attempts += 1
+                node.inflight[task.id] = task
+                sends.append((node, node.conn, task))
+
+        for node, conn, task in sends:
+            try:
+                conn.send({"type": "run", "id": task.id, "skill": task.skill, "payload": task.kind}, task.body)
+            except OSError:
+                self._lost(node, conn)
+
+    def _abandon(self, task):
+        """Forget a timed-out step (a node still running it finishes it unobserved)"""
+        with self._lock:
+            if task in self._pending:
+                self._pending.remove(task)
+            for node in self.nodes:
+                node.inflight.pop(task.id, None)
+        self._schedule()
+
+    def _watch(self):
+        """Drop silent nodes, reconnect lost ones, and fail steps when no node is left"""
+        while not self._closed.wait(HEARTBEAT_INTERVAL):
+            now = time.monotonic()
+            for node in self.nodes:
+                conn = node.conn
+                if conn and now - node.last_seen > self.heartbeat_timeout:
+                    self._lost(node, conn)
+                elif not conn and now - node.last_attempt > self.reconnect_interval:
+                    self._connect(node)
+
+            if any(node.conn for node in self.nodes):
+                self._stranded_since = None
+            elif self._stranded_since is None:
+                self._stranded_since = now
+            elif now - self._stranded_since > self.reconnect_interval * 2:
+                self._fail_pending(WorkerCrashed("No remote workers reachable"))
+
+    def _fail_pending(self, error):
+        with self._lock:
+            tasks, self._pending = list(self._pending), deque()
+        for task in tasks:
+            self._resolve(task, error=error)
+
+    @staticmethod
+    def _resolve(task, result=None, error=None):
+        try:
+            if error is not None:
+                task.future.set_exception(error)
+            else:
+                task.future.set_result(result)
+        except InvalidStateError:
+            pass
+
+
+class LoopbackWorkerPool(RemoteWorkerPool):
+    """RemoteWorkerPool over worker servers on 127.0.0.1 threads in this process"""
+
+    def __init__(self, runner, size=2, capacity=2, **options):
+        self.servers = [WorkerServer(runner, capacity=capacity, token=options.get("token")).start()
+                        for _ in range(size)]
+        super().__init__([server.address for server in self.servers], **options)
+
+    @classmethod
+    def from_config(cls, skills_dir, config):
+        return cls(
+            InProcessRunner(skills_dir),
+            size=config.get("size", 2),
+            capacity=config.get("capacity", 2),
+            max_retries=config.get("max_retries", 2),
+        )
+
+    def kill(self, index):
+        """Drop a node abruptly, as if its machine went away"""
+        self.servers[index].close()
+
+    def close(self):
+        super().close()
+        for server in self.servers:
+            server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve composite workflow steps to remote orchestrators")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    serve = subcommands.add_parser("serve", help="Run this machine's skills for coordinators")
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default {DEFAULT_PORT})")
+    serve.add_argument("--skills-dir", default=".claude/skills")
+    serve.add_argument("--capacity", type=int, default=os.cpu_count() or 1,
+                       help="Steps run at once (default: one per CPU)")
+    serve.add_argument("--max-tasks-per-worker", type=int, default=1000,
+                       help="Recycle a worker process after this many invocations (default: 1000)")
+    args = parser.parse_args()
+
+    pool = SkillWorkerPool(args.skills_dir, args.capacity, args.max_tasks_per_worker)
+    server = WorkerServer(pool.run, args.host, args.port, args.capacity, token=os.environ.get(TOKEN_ENV))
+    print(f"Serving {args.skills_dir} on {server.address} (capacity {args.capacity})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
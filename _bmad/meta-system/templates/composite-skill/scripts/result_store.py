@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Result Store
+Retention policies for intermediate step results
+
+Once every consumer of a step has received its output, the orchestrator
+applies the retention policy to that step's entry in `all_results`:
+
+- full:     keep the output in memory (default)
+- metadata: drop the output, keep its metadata, size and SHA-256 digest
+- spill:    write the output to disk and keep a handle (`output_ref`)
+
+Outputs of sink steps (the final output) are always kept.
+"""
+
+import os
+import json
+import mmap
+import tempfile
+from pathlib import Path
+
+from payload import is_buffer, json_default, payload_size
+from step_cache import hash_input
+
+
+RETENTION_POLICIES = ["full", "metadata", "spill"]
+
+
+class ResultStore:
+    """Directory of spilled step outputs, addressed by handle"""
+
+    def __init__(self, directory=None):
+        if directory:
+            self.directory = Path(directory)
+            self.directory.mkdir(parents=True, exist_ok=True)
+        else:
+            self.directory = Path(tempfile.mkdtemp(prefix="mas-results-"))
+
+    def put(self, step_name, output):
+        """Write an output to disk and return its handle
+
+        Every put gets its own file, so sub-workflow calls, recursive steps
+        and runs sharing the directory never overwrite each other's outputs.
+        """
+        binary = is_buffer(output)
+        fd, path = tempfile.mkstemp(dir=self.directory, prefix=f"{step_name}-",
+                                    suffix=".bin" if binary else ".json")
+        try:
+            with os.fdopen(fd, "wb" if binary else "w") as f:
+                if binary:
+                    f.write(output)
+                else:
+                    json.dump(output, f, default=json_default)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path
+
+    def load(self, ref):
+        """Read a spilled output back (binary outputs are memory-mapped)"""
+        path = Path(ref)
+        if path.suffix == ".bin":
+            if path.stat().st_size == 0:
+                return memoryview(b"")
+            with open(path, "rb") as f:
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        with open(path, "r") as f:
+            return json.load(f)
+
+
+def retain(step_name, result, policy, store=None):
+    """Apply a retention policy to one step result; returns the entry to keep"""
+    if policy == "full" or "output" not in result:
+        return result
+
+    output = result["output"]
+    entry = {key: value for key, value in result.items() if key != "output"}
+    entry["output_bytes"] = payload_size(output)
+    entry["output_digest"] = hash_input(output)
+    if policy == "spill":
+        entry["output_ref"] = store.put(step_name, output)
+    return entry
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Skill Worker Pool
+Runs real skills in long-lived worker processes
+
+Each worker imports a skill's `scripts/main.py` the first time it is asked
+to run it and keeps `process_input` loaded, serving many invocations over a
+pipe. Workers are recycled after `max_tasks_per_worker` invocations, and a
+worker that crashes fails only the step it was running: the pool replaces it.
+Large buffers cross the pipe as memory-mapped payloads (see payload.py).
+"""
+
+import sys
+import time
+import threading
+import importlib.util
+import multiprocessing
+from pathlib import Path
+
+from payload import discard, pack, unpack
+
+
+class SkillError(Exception):
+    """The skill raised while processing its input"""
+
+
+class WorkerCrashed(SkillError):
+    """The worker process died while running a skill"""
+
+
+def load_skill(skills_dir, skill_name):
+    """Import `<skills_dir>/<skill_name>/scripts/main.py` and return its process_input"""
+    scripts_dir = Path(skills_dir) / skill_name / "scripts"
+    main_py = scripts_dir / "main.py"
+    if not main_py.exists():
+        raise FileNotFoundError(f"E001: Skill not found ({main_py})")
+
+    # Skill scripts may import their siblings
+    sys.path.insert(0, str(scripts_dir))
+    try:
+        spec = importlib.util.spec_from_file_location(f"mas_skill_{skill_name.replace('-', '_')}", main_py)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(scripts_dir))
+
+    if not hasattr(module, "process_input"):
+        raise AttributeError(f"{main_py} does not define process_input()")
+    return module.process_input
+
+
+def _worker_main(conn, skills_dir, max_tasks):
+    """Worker loop: serve (skill_name, data) requests until told to stop or recycled"""
+    handlers = {}
+    served = 0
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+
+        skill_name, data = request
+        try:
+            if skill_name not in handlers:
+                handlers[skill_name] = load_skill(skills_dir, skill_name)
+            # The parent owns the input file; the result file is claimed by the parent
+            conn.send(("ok", pack(handlers[skill_name](unpack(data)))))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+        served += 1
+        if max_tasks and served >= max_tasks:
+            return
+
+
+class _Worker:
+    def __init__(self, context, skills_dir, max_tasks):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child, str(skills_dir), max_tasks), daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.max_tasks = max_tasks
+        self.tasks = 0
+        self.loaded = set()
+
+    @property
+    def usable(self):
+        return self.process.is_alive() and not (self.max_tasks and self.tasks >= self.max_tasks)
+
+    def stop(self, force=False):
+        if force or not self.process.is_alive():
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class SkillWorkerPool:
+    def __init__(self, skills_dir, size=4, max_tasks_per_worker=1000, start_method="spawn"):
+        self.skills_dir = Path(skills_dir)
+        self.size = size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        # spawn: forking a parent that is running threads is unsafe
+        self._context = multiprocessing.get_context(start_method)
+        self._idle = []
+        self._count = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.counters = {"tasks": 0, "spawned": 0, "recycled": 0, "crashed": 0}
+
+    @classmethod
+    def from_config(cls, skills_dir, config):
+        """Build a pool from the composite `worker_pool` settings"""
+        return cls(
+            skills_dir,
+            size=config.get("size", 4),
+            max_tasks_per_worker=config.get("max_tasks_per_worker", 1000),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, skill_name, data, timeout=None):
+        """Run `process_input` of a skill in a warm worker and return its result
+
+        `timeout` covers waiting for a free worker as well as the run; a
+        worker that overruns it is killed so its slot is freed.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        worker = self._acquire(skill_name, deadline)
+        request = pack(data)
+        expired = False
+        try:
+            worker.conn.send((skill_name, request))
+            # TimeoutError is an OSError: raise it after the crash handling below
+            expired = deadline is not None and not worker.conn.poll(max(0.0, deadline - time.monotonic()))
+            if expired:
+                worker.stop(force=True)
+            else:
+                status, payload = worker.conn.recv()
+                worker.tasks += 1
+                worker.loaded.add(skill_name)
+        except (EOFError, OSError) as e:
+            worker.stop(force=True)
+            with self._cond:
+                self.counters["crashed"] += 1
+            raise WorkerCrashed(
+                f"Worker running {skill_name} died (exit code {worker.process.exitcode})"
+            ) from e
+        finally:
+            discard(request)
+            self._release(worker)
+
+        if expired:
+            raise TimeoutError(f"E004: Execution timeout ({skill_name} exceeded {timeout}s)")
+        with self._cond:
+            self.counters["tasks"] += 1
+        if status == "error":
+            raise SkillError(f"{skill_name}: {payload}")
+        return unpack(payload, claim=True)
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, workers=self._count, idle=len(self._idle))
+
+    def close(self):
+        """Stop every idle worker; busy workers stop when released"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
+
+    def _acquire(self, skill_name, deadline=None):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Worker pool is closed")
+                if self._idle:
+                    # Prefer a worker that already has this skill imported
+                    for worker in self._idle:
+                        if skill_name in worker.loaded:
+                            break
+                    else:
+                        worker = self._idle[-1]
+                    self._idle.remove(worker)
+                    return worker
+                if self._count < self.size:
+                    self._count += 1
+                    self.counters["spawned"] += 1
+                    break
+                if deadline is None:
+                    self._cond.wait()
+                elif not self._cond.wait(deadline - time.monotonic()) and time.monotonic() >= deadline:
+                    raise TimeoutError(f"E004: Execution timeout (no free worker for {skill_name})")
+
+        # Spawn outside the lock: starting an interpreter takes a while
+        try:
+            return _Worker(self._context, self.skills_dir, self.max_tasks_per_worker)
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker):
+        keep = False
+        with self._cond:
+            if not self._closed and worker.usable:
+                self._idle.append(worker)
+                keep = True
+            else:
+                self._count -= 1
+                if worker.process.is_alive() or worker.process.exitcode == 0:
+                    self.counters["recycled"] += 1
+            self._cond.notify()
+        if not keep:
+            worker.stop()
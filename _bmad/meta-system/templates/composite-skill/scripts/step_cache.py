@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Step Result Cache
+Content-addressed cache for composite workflow steps
+
+Entries are keyed by skill name, skill version and a hash of the step input,
+so a new skill release or a changed input never returns a stale result.
+A bounded in-memory LRU sits in front of an optional on-disk layer that
+survives restarts.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+def _hash_default(value):
+    """Nested buffers stand in by their content digest, never by their repr (which holds an address)"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"__buffer_sha256__": hashlib.sha256(value).hexdigest()}
+    return str(value)
+
+
+def hash_input(data):
+    """Stable SHA-256 of a step input"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        # Hash buffers in place instead of copying them into bytes
+        return hashlib.sha256(data).hexdigest()
+    payload = json.dumps(data, sort_keys=True, default=_hash_default).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class StepCache:
+    def __init__(self, max_entries=256, directory=None, ttl=None):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory else None
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a cache from the composite `cache` settings"""
+        return cls(
+            max_entries=config.get("max_entries", 256),
+            directory=config.get("directory"),
+            ttl=config.get("ttl"),
+        )
+
+    def key(self, skill_name, skill_version, data):
+        """Cache key for one skill invocation"""
+        digest = hashlib.sha256()
+        digest.update(f"{skill_name}@{skill_version}:".encode("utf-8"))
+        digest.update(hash_input(data).encode("ascii"))
+        return digest.hexdigest()
+
+    def get(self, key, ttl=None, memory=True):
+        """Return the cached result for `key`, or None
+
+        With `memory=False` a disk hit is not kept in the in-memory LRU.
+        """
+        ttl = self.ttl if ttl is None else ttl
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry, ttl):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is not None and not self._expired(entry, ttl):
+                if memory:
+                    self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def put(self, key, result, memory=True):
+        """Store a step result; `memory=False` writes only the disk layer (if any)"""
+        entry = (time.time(), result)
+        if memory:
+            with self._lock:
+                self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def stats(self):
+        """Hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._memory),
+            }
+
+    def _expired(self, entry, ttl):
+        return ttl is not None and time.time() - entry[0] > ttl
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "r") as f:
+                stored = json.load(f)
+            return stored["created"], stored["result"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.directory:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"created": entry[0], "result": entry[1]}, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            # Results that cannot be serialized stay memory-only
+            if os.path.exists(tmp):
+                os.unlink(tmp)
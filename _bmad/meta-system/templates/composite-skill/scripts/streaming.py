@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Streaming Pipeline
+Pushes chunks of input through composite workflow steps incrementally
+
+Each stage is a generator that consumes an iterator of chunks and yields
+output chunks. Stages run in their own threads connected by bounded queues,
+so a slow stage blocks its upstream (backpressure) and memory stays constant
+no matter how large the input is.
+"""
+
+import json
+import queue
+import threading
+
+
+CHUNK_MODES = ["line", "ndjson", "bytes"]
+
+_DONE = object()
+
+
+class StageError(Exception):
+    """A pipeline stage raised; `stage` names the failing step"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"{stage}: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def read_chunks(stream, mode="line", chunk_size=64 * 1024):
+    """Read `stream` incrementally as lines, NDJSON records or fixed-size blocks"""
+    if mode == "bytes":
+        raw = getattr(stream, "buffer", stream)
+        while True:
+            block = raw.read(chunk_size)
+            if not block:
+                return
+            yield block
+    elif mode == "ndjson":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif mode == "line":
+        for line in stream:
+            yield line.rstrip("\n")
+    else:
+        raise ValueError(f"Unknown chunk mode '{mode}' (expected one of: {', '.join(CHUNK_MODES)})")
+
+
+def write_chunk(stream, chunk, mode="line"):
+    """Write one output chunk and flush it immediately"""
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        stream.flush()
+        raw = getattr(stream, "buffer", stream)
+        raw.write(chunk)
+        raw.flush()
+        return
+    if mode == "ndjson" or not isinstance(chunk, str):
+        chunk = json.dumps(chunk, separators=(",", ":"), default=str)
+    stream.write(chunk)
+    if mode != "bytes":
+        stream.write("\n")
+    stream.flush()
+
+
+class StreamPipeline:
+    def __init__(self, stages, queue_size=8):
+        # stages: list of (name, generator function) pairs
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, source):
+        """Yield the output chunks of the last stage as they are produced"""
+        stop = threading.Event()
+        errors = []
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+
+        def put(outbound, item):
+            # Blocks while the downstream queue is full, unless the pipeline stops
+            while not stop.is_set():
+                try:
+                    outbound.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def drain(inbound):
+            while not stop.is_set():
+                try:
+                    item = inbound.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    return
+                yield item
+
+        def pump(name, stage, inbound, outbound):
+            try:
+                for item in stage(inbound):
+                    if not put(outbound, item):
+                        return
+            except Exception as e:
+                errors.append(StageError(name, e))
+                stop.set()
+            finally:
+                put(outbound, _DONE)
+
+        inbound = iter(source)
+        for (name, stage), outbound in zip(self.stages, queues):
+            # Daemon threads: a stage blocked on input must not keep the process alive
+            threading.Thread(target=pump, args=(name, stage, inbound, outbound), daemon=True).start()
+            inbound = drain(outbound)
+
+        try:
+            yield from inbound
+        finally:
+            stop.set()
+
+        if errors:
+            raise errors[0]
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Step Tracing
+Per-step timing, memory and payload instrumentation for composite workflows
+
+A StepProbe measures one step where it runs (worker thread or process) and
+produces a span; the Tracer collects spans in the orchestrator and writes
+them as JSONL or in Chrome trace-event format (chrome://tracing, Perfetto).
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from pathlib import Path
+
+from payload import payload_size
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+TRACE_FORMATS = ["jsonl", "chrome"]
+PROFILE_MODES = ["cprofile", "tracemalloc"]
+
+
+def peak_rss_kb():
+    """High-water resident set size of this process in KiB (process-wide, never decreases)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class StepProbe:
+    """Measure one step; use as a context manager around the skill call"""
+
+    def __init__(self, step_name, profile=None, profile_dir=".", cpu_clock=time.thread_time):
+        if profile and profile not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{profile}' (expected one of: {', '.join(PROFILE_MODES)})")
+        self.step_name = step_name
+        self.profile = profile
+        self.profile_dir = Path(profile_dir)
+        self.cpu_clock = cpu_clock
+        self.span = {"step": step_name, "pid": os.getpid(), "tid": threading.get_native_id()}
+        self._profiler = None
+
+    def __enter__(self):
+        if self.profile == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == "tracemalloc":
+            # tracemalloc is process-wide: concurrent steps share its peak
+            tracemalloc.start()
+        self._cpu = self.cpu_clock() if self.cpu_clock else None
+        self._rss = peak_rss_kb()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.span["start"] = self._start
+        self.span["wall_ms"] = round((end - self._start) * 1000, 3)
+        self.span["cpu_ms"] = round((self.cpu_clock() - self._cpu) * 1000, 3) if self.cpu_clock else None
+        # ru_maxrss is the process high-water mark, so a step is only charged
+        # for how far it raised that mark; concurrent steps in one process
+        # can still claim each other's growth
+        peak = peak_rss_kb()
+        self.span["process_peak_rss_kb"] = peak
+        self.span["peak_rss_growth_kb"] = peak - self._rss if peak is not None else None
+        self.span["status"] = "error" if exc else "ok"
+
+        if self._profiler:
+            self._profiler.disable()
+            self._write_profile()
+        elif self.profile == "tracemalloc":
+            snapshot = tracemalloc.take_snapshot()
+            self.span["peak_alloc_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.span["top_allocations"] = [
+                f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size} B"
+                for stat in snapshot.statistics("lineno")[:10]
+            ]
+
+        if exc is not None:
+            # Travels with the exception (also across process boundaries)
+            exc.trace_span = self.span
+        return False
+
+    def finish(self, data, result):
+        """Record payload sizes once the skill has returned"""
+        self.span["input_bytes"] = payload_size(data)
+        self.span["output_bytes"] = payload_size(result.get("output"))
+
+    def _write_profile(self):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        path = self.profile_dir / f"{self.step_name}.prof"
+        self._profiler.dump_stats(str(path))
+        summary = io.StringIO()
+        pstats.Stats(self._profiler, stream=summary).sort_stats("cumulative").print_stats(15)
+        self.span["profile"] = str(path)
+        self.span["profile_summary"] = summary.getvalue()
+
+
+class Tracer:
+    """Collects step spans and writes them out as JSONL or Chrome trace events"""
+
+    def __init__(self, path=None, fmt="jsonl"):
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{fmt}' (expected one of: {', '.join(TRACE_FORMATS)})")
+        self.path = Path(path) if path else None
+        self.fmt = fmt
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._file = None
+        if self.path and fmt == "jsonl":
+            self._file = open(self.path, "a")
+
+    def record(self, span):
+        span = dict(span, start_ms=round((span.get("start", self.origin) - self.origin) * 1000, 3))
+        span.pop("start", None)
+        self.spans.append(span)
+        if self._file:
+            # Flush per span so a crashed workflow still leaves its trace
+            self._file.write(json.dumps(span) + "\n")
+            self._file.flush()
+
+    def summary(self):
+        """Wall time per step, slowest first"""
+        return sorted(
+            ({"step": s["step"], "wall_ms": s.get("wall_ms", 0), "cpu_ms": s.get("cpu_ms")} for s in self.spans),
+            key=lambda s: s["wall_ms"],
+            reverse=True,
+        )
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        elif self.path and self.fmt == "chrome":
+            with open(self.path, "w") as f:
+                json.dump({"traceEvents": [self._chrome_event(s) for s in self.spans]}, f)
+
+    def _chrome_event(self, span):
+        args = {k: v for k, v in span.items() if k not in ("step", "pid", "tid", "start_ms", "wall_ms")}
+        return {
+            "name": span["step"],
+            "cat": "step",
+            "ph": "X",
+            "ts": span["start_ms"] * 1000,
+            "dur": span.get("wall_ms", 0) * 1000,
+            "pid": span.get("pid", 0),
+            "tid": span.get("tid", 0),
+            "args": args,
+        }
@@ -2,12 +2,76 @@
 """
 Meta Skill: Creates other skills
 Usage: python create.py <skill_name> <description> <type>
+       python create.py --batch <manifest.json|manifest.ndjson|-> [--jobs N] [--root DIR]
+
+Batch mode creates every skill listed in a manifest (a JSON array or one
+JSON object per line, each with name, description and optional type) in one
+process. Templates are parsed once, skills are written in parallel, every
+file is written atomically and left untouched when its content is unchanged,
+and each skill is validated right after it is written.
 """
 
+import re
 import sys
 import json
 import os
+import string
+import tempfile
+import argparse
 from pathlib import Path
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+SKILLS_ROOT = ".claude/skills"
+SKILL_DIRS = ["scripts", "references", "assets"]
+NAME_PATTERN = re.compile(r"^[a-z0-9-]+$")
+
+# mkstemp creates files 0600; generated files get a fixed, world-readable mode
+# (reading the umask would briefly change it for every thread)
+FILE_MODE = 0o644
+
+SKILL_MD_TEMPLATE = """---
+name: {name}
+description: {description}
+type: {type}
+version: 1.0.0
+---
+
+# {title}
+
+## Overview
+{description}
+
+## Quick Start
+[Usage example]
+
+## Core Capabilities
+{capabilities}
+
+## Resources
+- scripts/ - Implementation
+- references/ - Documentation
+- assets/ - Templates
+"""
+
+CAPABILITY_TEMPLATE = """### {capability}
+- Description
+- Example"""
+
+
+def compile_template(text):
+    """Split a str.format-style template once into (literal, field) pairs"""
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(text)]
+
+
+def render(template, values):
+    """Fill a compiled template; no format-string parsing happens here"""
+    return "".join(literal + (str(values[field]) if field is not None else "") for literal, field in template)
+
+
+SKILL_MD = compile_template(SKILL_MD_TEMPLATE)
+CAPABILITY = compile_template(CAPABILITY_TEMPLATE)
 
 
 def analyze_requirements(name, description, skill_type):
@@ -27,12 +91,8 @@ def extract_capabilities(description):
     return ["capability-1", "capability-2"]
 
 
-def generate_structure(analysis):
-    """Generate skill directory structure"""
-    skill_dir = Path(f".claude/skills/{analysis['name']}")
-    skill_dir.mkdir(parents=True, exist_ok=True)
-
-    # Create skill.json
+def render_skill(analysis):
+    """Contents of every generated file, keyed by path relative to the skill"""
     skill_json = {
         "name": analysis['name'],
         "version": "1.0.0",
@@ -43,43 +103,53 @@ def generate_structure(analysis):
         "dependencies": analysis['dependencies']
     }
 
-    with open(skill_dir / "skill.json", "w") as f:
-        json.dump(skill_json, f, indent=2)
+    skill_md = render(SKILL_MD, {
+        "name": analysis['name'],
+        "description": analysis['description'],
+        "type": analysis['type'],
+        "title": analysis['name'].replace('-', ' ').title(),
+        "capabilities": "\n".join(render(CAPABILITY, {"capability": cap}) for cap in analysis['capabilities']),
+    })
 
-    # Create SKILL.md
-    skill_md = f"""---
-name: {analysis['name']}
-description: {analysis['description']}
-type: {analysis['type']}
-version: 1.0.0
----
+    return {
+        "skill.json": json.dumps(skill_json, indent=2),
+        "SKILL.md": skill_md,
+    }
 
-# {analysis['name'].replace('-', ' ').title()}
 
-## Overview
-{analysis['description']}
+def write_atomic(path, content):
+    """Write `content` via a temp file and rename; returns False if the file already had it"""
+    data = content.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
 
-## Quick Start
-[Usage example]
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
 
-## Core Capabilities
-{chr(10).join(f'### {cap}\n- Description\n- Example' for cap in analysis['capabilities'])}
-
-## Resources
-- scripts/ - Implementation
-- references/ - Documentation
-- assets/ - Templates
-"""
 
-    with open(skill_dir / "SKILL.md", "w") as f:
-        f.write(skill_md)
+def generate_structure(analysis, root=SKILLS_ROOT):
+    """Generate skill directory structure; returns (skill_dir, files written)"""
+    skill_dir = Path(root) / analysis['name']
+    for subdir in SKILL_DIRS:
+        (skill_dir / subdir).mkdir(parents=True, exist_ok=True)
 
-    # Create directories
-    (skill_dir / "scripts").mkdir(exist_ok=True)
-    (skill_dir / "references").mkdir(exist_ok=True)
-    (skill_dir / "assets").mkdir(exist_ok=True)
+    written = 0
+    for relpath, content in render_skill(analysis).items():
+        written += write_atomic(skill_dir / relpath, content)
 
-    return skill_dir
+    return skill_dir, written
 
 
 def validate_skill(skill_dir):
@@ -92,9 +162,142 @@ def validate_skill(skill_dir):
     return True, "Valid"
 
 
+class InvalidRecord:
+    """A manifest line that is not valid JSON; reported as a failed record"""
+
+    __slots__ = ("label", "reason")
+
+    def __init__(self, label, reason):
+        self.label = label
+        self.reason = reason
+
+
+def read_manifest(path):
+    """Skill definitions from a JSON array or NDJSON file ("-" reads stdin)
+
+    NDJSON lines that are not valid JSON come back as InvalidRecord entries
+    so that the rest of the batch still runs.
+    """
+    text = sys.stdin.read() if path == "-" else Path(path).read_text()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    records = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError as e:
+            records.append(InvalidRecord(f"line {number}", f"invalid JSON: {e}"))
+    return records
+
+
+def record_label(record, position=None):
+    """How a manifest entry is named in results: its name, or where it is"""
+    if isinstance(record, InvalidRecord):
+        return record.label
+    if isinstance(record, dict) and isinstance(record.get("name"), str) and record["name"]:
+        return record["name"]
+    return f"record {position}" if position else "record"
+
+
+def record_error(record):
+    """Why a manifest entry cannot be created, or None"""
+    if isinstance(record, InvalidRecord):
+        return record.reason
+    if not isinstance(record, dict):
+        return "must be a JSON object"
+    name = record.get("name", "")
+    if not isinstance(name, str) or not NAME_PATTERN.match(name):
+        return "name must be lowercase letters, digits and hyphens"
+    description = record.get("description")
+    if not isinstance(description, str) or not description.strip():
+        return "missing description"
+    if not isinstance(record.get("type", "base"), str):
+        return "type must be a string"
+    return None
+
+
+def create_skill(record, root=SKILLS_ROOT):
+    """Create and validate one manifest entry; returns (name, status, message)"""
+    error = record_error(record)
+    if error:
+        return record_label(record), "failed", error
+    name = record["name"]
+
+    analysis = analyze_requirements(name, record["description"], record.get("type", "base"))
+    try:
+        skill_dir, written = generate_structure(analysis, root)
+    except OSError as e:
+        return name, "failed", str(e)
+
+    valid, message = validate_skill(skill_dir)
+    if not valid:
+        return name, "failed", message
+    return name, "written" if written else "unchanged", str(skill_dir)
+
+
+def create_batch(records, root=SKILLS_ROOT, jobs=None):
+    """Create skills from manifest records in parallel; returns results in manifest order
+
+    Every record is checked up front: a malformed one fails on its own
+    without stopping the others.
+    """
+    checked = [(record_label(record, position), record_error(record), record)
+               for position, record in enumerate(records, 1)]
+    counts = Counter(label for label, error, _ in checked if error is None)
+
+    def create(entry):
+        label, error, record = entry
+        if error:
+            return label, "failed", error
+        if counts[label] > 1:
+            return label, "failed", "duplicate name in manifest"
+        return create_skill(record, root)
+
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        return list(pool.map(create, checked))
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(description="Create skills from a JSON or NDJSON manifest")
+    parser.add_argument("--batch", required=True, metavar="MANIFEST", help="Manifest file, or - for stdin")
+    parser.add_argument("--root", default=SKILLS_ROOT, help=f"Skills directory (default {SKILLS_ROOT})")
+    parser.add_argument("--jobs", type=int, help="Skills written in parallel")
+    args = parser.parse_args(argv)
+
+    try:
+        records = read_manifest(args.batch)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read manifest: {e}")
+        sys.exit(1)
+    if not isinstance(records, list):
+        print("❌ Cannot read manifest: expected a JSON array or one JSON object per line")
+        sys.exit(1)
+
+    results = create_batch(records, args.root, args.jobs)
+
+    counts = {}
+    for name, status, message in results:
+        counts[status] = counts.get(status, 0) + 1
+        if status == "failed":
+            print(f"❌ {name}: {message}")
+        elif status == "written":
+            print(f"✅ Skill created: {message}")
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+    if counts.get("failed"):
+        sys.exit(1)
+
+
 if __name__ == "__main__":
+    if "--batch" in sys.argv[1:]:
+        batch_main(sys.argv[1:])
+        sys.exit(0)
+
     if len(sys.argv) < 4:
         print("Usage: python create.py <name> <description> <type>")
+        print("       python create.py --batch <manifest> [--jobs N] [--root DIR]")
         sys.exit(1)
 
     name = sys.argv[1]
@@ -107,7 +310,7 @@ if __name__ == "__main__":
     analysis = analyze_requirements(name, description, skill_type)
 
     # Generate
-    skill_dir = generate_structure(analysis)
+    skill_dir, _ = generate_structure(analysis)
 
     # Validate
     valid, message = validate_skill(skill_dir)
@@ -33,6 +33,11 @@ fail() {
     FAIL=$((FAIL + 1))
 }
 
+# Scratch space for the behavior tests below
+COMPOSITE_SCRIPTS="$PWD/_bmad/meta-system/templates/composite-skill/scripts"
+TEST_TMP=$(mktemp -d)
+trap 'rm -rf "$TEST_TMP"' EXIT
+
 # Test 1: Check all scripts exist
 test_step "All export tools exist"
 for script in installer.sh updater.sh publisher.sh marketplace.sh validate-system.sh export-system.sh export-skill.sh; do
@@ -180,6 +185,284 @@ else
     fail "Marketplace --help failed"
 fi
 
+# Test 16: Composite orchestrator keeps explicit outputs under retention
+test_step "Orchestrator retention keeps output steps"
+if python3 - > /dev/null 2>&1 <<'PY'
+import sys
+import tempfile
+sys.path.insert(0, "_bmad/meta-system/templates/composite-skill/scripts")
+from orchestrator import WorkflowOrchestrator
+from result_store import ResultStore
+
+config = {"type_specific": {"composite": {
+    "composition_type": "sequential",
+    "output": "a",
+    "base_skills": [
+        {"name": "a", "role": "input"},
+        {"name": "b", "role": "output", "inputs": ["a"]},
+    ],
+}}}
+for retention in ("metadata", "spill"):
+    with tempfile.TemporaryDirectory() as spill_dir:
+        result = WorkflowOrchestrator(config, retention=retention, result_store=ResultStore(spill_dir)).execute("x")
+    assert result["status"] == "success", result
+    assert result["final_output"] == "Processed by a: x", result["final_output"]
+PY
+then
+    pass "Non-sink output step survives metadata/spill retention"
+else
+    fail "Retention stripped an output step"
+fi
+
+# Test 17: Step timeouts stop a hung skill and free its worker
+test_step "Step timeouts with a worker pool"
+mkdir -p "$TEST_TMP/skills/hang/scripts" "$TEST_TMP/skills/echo/scripts"
+cat > "$TEST_TMP/skills/hang/scripts/main.py" <<'PY'
+import time
+
+def process_input(data):
+    time.sleep(60)
+    return data
+PY
+cat > "$TEST_TMP/skills/echo/scripts/main.py" <<'PY'
+def process_input(data):
+    return f"echo: {data}"
+PY
+cat > "$TEST_TMP/test_timeout.py" <<'PY'
+import sys
+import time
+import asyncio
+sys.path.insert(0, sys.argv[1])
+from orchestrator import WorkflowOrchestrator
+from skill_workers import SkillWorkerPool
+
+
+def workflow(skill):
+    return {"type_specific": {"composite": {
+        "composition_type": "sequential",
+        "skills_dir": sys.argv[2],
+        "step_timeout": 1,
+        "base_skills": [{"name": skill, "role": "input"}],
+    }}}
+
+
+if __name__ == "__main__":
+    started = time.monotonic()
+    with SkillWorkerPool(sys.argv[2], size=1) as pool:
+        hung = asyncio.run(WorkflowOrchestrator(workflow("hang"), worker_pool=pool).execute_async("x"))
+        assert hung["status"] == "error" and hung["error"].startswith("E004"), hung
+        # The hung worker was stopped, so the pool's only slot is free again
+        healthy = asyncio.run(WorkflowOrchestrator(workflow("echo"), worker_pool=pool).execute_async("x"))
+        assert healthy["final_output"] == "echo: x", healthy
+    assert time.monotonic() - started < 20
+PY
+if timeout 60 python3 "$TEST_TMP/test_timeout.py" "$COMPOSITE_SCRIPTS" "$TEST_TMP/skills" > /dev/null 2>&1; then
+    pass "Timed-out step is stopped and the next workflow gets its worker"
+else
+    fail "Step timeout left a worker busy or a run hanging"
+fi
+
+cat > "$TEST_TMP/hang.json" <<JSON
+{"type_specific": {"composite": {"composition_type": "sequential", "skills_dir": "$TEST_TMP/skills",
+  "step_timeout": 1, "base_skills": [{"name": "hang", "role": "input"}]}}}
+JSON
+if echo x | timeout 30 python3 "$COMPOSITE_SCRIPTS/orchestrator.py" "$TEST_TMP/hang.json" --workers 1 2>/dev/null | grep -q "E004"; then
+    pass "CLI reports E004 and exits after a step timeout"
+else
+    fail "CLI hung or did not report the step timeout"
+fi
+
+# Test 18: Warm workers are replaced after a crash and recycled after max tasks
+test_step "Worker crash and recycling"
+mkdir -p "$TEST_TMP/skills/crash/scripts"
+cat > "$TEST_TMP/skills/crash/scripts/main.py" <<'PY'
+import os
+
+def process_input(data):
+    os._exit(3)
+PY
+cat > "$TEST_TMP/test_workers.py" <<'PY'
+import sys
+sys.path.insert(0, sys.argv[1])
+from skill_workers import SkillWorkerPool, WorkerCrashed
+
+if __name__ == "__main__":
+    with SkillWorkerPool(sys.argv[2], size=1) as pool:
+        try:
+            pool.run("crash", "x", timeout=30)
+        except WorkerCrashed:
+            pass
+        else:
+            raise AssertionError("crash did not raise WorkerCrashed")
+        assert pool.run("echo", "x", timeout=30) == "echo: x"
+        stats = pool.stats()
+        assert stats["crashed"] == 1 and stats["spawned"] == 2, stats
+
+    with SkillWorkerPool(sys.argv[2], size=1, max_tasks_per_worker=2) as pool:
+        for i in range(5):
+            assert pool.run("echo", i, timeout=30) == f"echo: {i}"
+        stats = pool.stats()
+        assert stats["recycled"] >= 2 and stats["crashed"] == 0, stats
+PY
+if timeout 60 python3 "$TEST_TMP/test_workers.py" "$COMPOSITE_SCRIPTS" "$TEST_TMP/skills" > /dev/null 2>&1; then
+    pass "Crashed worker fails only its task; workers recycle after max tasks"
+else
+    fail "Worker pool did not recover from a crash or recycle its workers"
+fi
+
+# Test 19: Remote worker protocol (framing, auth, frame caps, node loss)
+test_step "Remote worker protocol"
+cat > "$TEST_TMP/test_remote.py" <<'PY'
+import sys
+import json
+import socket
+sys.path.insert(0, sys.argv[1])
+from remote_workers import FRAME, LoopbackWorkerPool, RemoteWorkerPool, WorkerServer
+
+
+def rejected(server, frame):
+    """True when the server drops a connection that opens with `frame`"""
+    with socket.create_connection(server.address.rsplit(":", 1)) as sock:
+        sock.settimeout(10)
+        sock.sendall(frame)
+        return sock.recv(1) == b""
+
+
+def frame(header, body=b""):
+    encoded = json.dumps(header).encode("utf-8")
+    return FRAME.pack(len(encoded), len(body)) + encoded + body
+
+
+if __name__ == "__main__":
+    runner = lambda skill_name, data: data
+    with LoopbackWorkerPool(runner, size=2, token="s3cret") as pool:
+        # Larger than one chunk, so the body travels as several part frames
+        payload = bytes(range(256)) * (3 * 4096 + 7)
+        assert bytes(pool.run("echo", payload, timeout=30)) == payload
+        assert pool.run("echo", {"k": [1, 2]}, timeout=30) == {"k": [1, 2]}
+
+        server = pool.servers[0]
+        try:
+            RemoteWorkerPool([server.address], token="wrong", connect_timeout=2)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("wrong token was accepted")
+        assert rejected(server, frame({"type": "part", "id": 1}, b"x" * 16))
+        assert rejected(server, FRAME.pack(0xFFFFFFF0, 0))
+
+        # Losing a node re-queues its steps on the other one
+        pool.kill(0)
+        for i in range(4):
+            assert pool.run("echo", i, timeout=30) == i
+        assert pool.stats()["workers"] == 1
+PY
+if timeout 60 python3 "$TEST_TMP/test_remote.py" "$COMPOSITE_SCRIPTS" > /dev/null 2>&1; then
+    pass "Chunked round trip, token check, frame caps and node loss"
+else
+    fail "Remote worker protocol misbehaved"
+fi
+
+# Test 20: Metrics append, compaction and re-folding of re-created segments
+test_step "Metrics store compaction"
+cat > "$TEST_TMP/test_metrics.py" <<'PY'
+import sys
+import json
+import time
+sys.path.insert(0, sys.argv[1])
+from metrics_store import MetricsStore
+
+if __name__ == "__main__":
+    directory = sys.argv[2]
+    store = MetricsStore(directory, segment_seconds=600, flush_records=1, compact_seconds=float("inf"))
+    for i in range(10):
+        store.record("a", i % 3 != 0, 0.01 * i, tokens=5, error=None if i % 3 else "boom")
+    # Appended records are visible before any compaction
+    assert store.skills()["a"]["invocations"] == 10
+    # One segment, or two if the records straddled a segment boundary
+    segments = list(store._segments().values())
+
+    assert store.compact(now=time.time() + 1800) == len(segments)
+    assert not any(segment.exists() for segment in segments)
+    summary = store.skills()["a"]
+    assert summary["invocations"] == 10 and summary["success_rate"] == 0.6, summary
+    assert [f["error"] for f in store.failed_requests()] == ["boom"] * 4
+    # The directory keeps the segment length it was created with
+    assert MetricsStore(directory, segment_seconds=60).segment_seconds == 600
+
+    # A segment re-created after it was folded is folded again, not skipped
+    segment = segments[0]
+    start = int(segment.stem.split("-", 1)[1])
+    segment.write_text(json.dumps([start + 1, "a", True, 0.5, 0, None]) + "\n")
+    assert store.compact(now=time.time() + 1800) == 1
+    assert store.skills()["a"]["invocations"] == 11
+    assert store.compact(now=time.time() + 1800) == 0
+PY
+if timeout 60 python3 "$TEST_TMP/test_metrics.py" "$COMPOSITE_SCRIPTS" "$TEST_TMP/metrics" > /dev/null 2>&1; then
+    pass "Records fold into rollups once; re-created segments are re-folded"
+else
+    fail "Metrics compaction lost or double-counted records"
+fi
+
+# Test 21: Validation cache reuse and invalidation
+test_step "Validation cache invalidation"
+mkdir -p "$TEST_TMP/ci-skills/demo"
+cat > "$TEST_TMP/ci-skills/demo/SKILL.md" <<'MD'
+# Demo
+
+## Overview
+A demo skill.
+
+## Purpose
+Exercise the validation cache.
+
+## Capabilities
+- Nothing
+MD
+cat > "$TEST_TMP/test_cache.py" <<'PY'
+import sys
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from skill_index import SkillIndex
+from validate_skills import check_index, open_cache
+from validation_cache import ValidationCache
+
+
+def validate(skills_dir, cache_dir):
+    cache = open_cache(cache_dir)
+    errors, _ = check_index(SkillIndex.build(skills_dir), cache)
+    cache.save()
+    return errors, cache
+
+
+if __name__ == "__main__":
+    skills_dir, cache_dir = Path(sys.argv[2]), sys.argv[3]
+    errors, cache = validate(skills_dir, cache_dir)
+    assert errors == [] and (cache.hits, cache.misses) == (0, 1)
+    errors, cache = validate(skills_dir, cache_dir)
+    assert errors == [] and (cache.hits, cache.misses) == (1, 0)
+
+    # An edited skill is re-checked
+    skill_md = skills_dir / "demo" / "SKILL.md"
+    skill_md.write_text(skill_md.read_text().replace("## Purpose", "## Intent"))
+    errors, cache = validate(skills_dir, cache_dir)
+    assert errors == ["demo: Missing ## Purpose"] and cache.misses == 1, errors
+
+    # Different rules drop every entry; removed skills are dropped on save
+    assert open_cache(cache_dir).entries
+    assert ValidationCache(cache_dir, "validate_skills", "other-rules").entries == {}
+    skill_md.unlink()
+    skill_md.parent.rmdir()
+    validate(skills_dir, cache_dir)
+    assert open_cache(cache_dir).entries == {}
+PY
+if timeout 60 python3 "$TEST_TMP/test_cache.py" "$PWD/_bmad/meta-system/github-workflows/scripts" \
+        "$TEST_TMP/ci-skills" "$TEST_TMP/validation-cache" > /dev/null 2>&1; then
+    pass "Unchanged skills hit the cache; edits and rule changes invalidate it"
+else
+    fail "Validation cache served stale or missing results"
+fi
+
 # Summary
 echo ""
 echo "╔════════════════════════════════════════════════════════════╗"